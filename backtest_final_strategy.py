@@ -1,11 +1,13 @@
 import pandas as pd
 import joblib
 import io
-from sklearn.ensemble import RandomForestRegressor
+from model_backends import fit_model, predict
 
 # --- Configuration ---
 EWMA_DATA_FILE = "nba_games_ewma_features.csv" # The full dataset of EWMA features
 
+MODEL_BACKEND = "forest" # 'forest' or 'hist_gb' (see model_backends.py)
+
 # --- Betting Strategy Configuration ---
 BETTING_THRESHOLDS = {
     "High_Confidence": {'edge': 8.0, 'units': 3},
@@ -78,13 +80,12 @@ try:
     y_train = train_df['point_differential']
 
     # Train our temporary, honest model
-    honest_model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-    honest_model.fit(X_train, y_train)
+    honest_model = fit_model(MODEL_BACKEND, X_train, y_train)
     print("Honest model trained successfully.")
 
     # 4. MAKE PREDICTIONS ON THE TEST SET USING THE HONEST MODEL
     X_test = test_df[features]
-    test_df['model_prediction'] = honest_model.predict(X_test)
+    test_df['model_prediction'] = predict(honest_model, X_test)
     test_df['edge'] = test_df['model_prediction'] - test_df['vegas_spread']
 
     # 5. IMPLEMENT THE VARIABLE BETTING STRATEGY
@@ -1,12 +1,14 @@
 import pandas as pd
 import joblib
 import io
-from sklearn.ensemble import RandomForestRegressor
+from model_backends import fit_model, predict
 
 # --- Configuration ---
 WNBA_MODEL_FILE = "wnba_model_final.joblib"
 WNBA_EWMA_DATA_FILE = "wnba_games_ewma_features.csv"
 
+MODEL_BACKEND = "forest" # 'forest' or 'hist_gb' (see model_backends.py)
+
 # --- Betting Strategy Configuration ---
 BETTING_THRESHOLDS = {
     "High_Confidence": {'edge': 8.0, 'units': 3},
@@ -73,13 +75,12 @@ try:
     X_train = train_df[features]
     y_train = train_df['point_differential']
 
-    honest_model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-    honest_model.fit(X_train, y_train)
+    honest_model = fit_model(MODEL_BACKEND, X_train, y_train)
     print("Honest WNBA model trained successfully.")
 
     # 4. MAKE PREDICTIONS ON THE TEST SET USING THE HONEST MODEL
     X_test = test_df[features]
-    test_df['model_prediction'] = honest_model.predict(X_test)
+    test_df['model_prediction'] = predict(honest_model, X_test)
     test_df['edge'] = test_df['model_prediction'] - test_df['vegas_spread']
 
     # 5. IMPLEMENT THE VARIABLE BETTING STRATEGY
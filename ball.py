@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# ball: one command line for the whole pipeline.
+#
+#     python ball.py collect  NBA WNBA          # data_collection*.py
+#     python ball.py features NBA               # feature_engineering_*.py
+#     python ball.py train    WNBA              # train_*.py (--ensemble: horizon_ensemble.py)
+#     python ball.py tune     WNBA              # tune_model_wnba.py
+#     python ball.py backtest NBA               # backtest_*_strategy.py
+#     python ball.py inspect  WNBA              # inspect_model_importance.py
+#     python ball.py forecast NBA --spreads spreads.txt   (or --spreads - to read stdin)
+#
+# Every subcommand takes its leagues as arguments or, with --batch FILE (or - for stdin), one per
+# line. The pipeline steps run the existing scripts unchanged. forecast answers from the
+# precomputed games or the matchup table without importing pandas, sklearn or nba_api.
+import argparse
+import os
+import sys
+import time
+
+STARTED = time.perf_counter()  # For --timing: everything after interpreter start-up, imports included
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Script run by each pipeline step, per league (None where the repo has no script for that league)
+STEP_SCRIPTS = {
+    'collect': {'NBA': "data_collection.py", 'WNBA': "data_collection_wnba.py"},
+    'features': {'NBA': "feature_engineering_final.py", 'WNBA': "feature_engineering_wnba.py"},
+    'train': {'NBA': "train_final_model.py", 'WNBA': "train_model_wnba.py"},
+    'tune': {'NBA': None, 'WNBA': "tune_model_wnba.py"},
+    'backtest': {'NBA': "backtest_final_strategy.py", 'WNBA': "backtest_wnba_strategy.py"},
+    'inspect': {'NBA': None, 'WNBA': "inspect_model_importance.py"},
+}
+LEAGUE_NAMES = ('NBA', 'WNBA')
+
+
+# --- Helper Functions ---
+def read_lines(source):
+    """Non-blank, non-comment lines of a file, or of stdin for '-'."""
+    handle = sys.stdin if source == '-' else open(source)
+    try:
+        return [line.strip() for line in handle if line.strip() and not line.lstrip().startswith('#')]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def requested_leagues(args):
+    leagues = [league.upper() for league in args.leagues]
+    if args.batch:
+        leagues += [line.upper() for line in read_lines(args.batch)]
+    unknown = [league for league in leagues if league not in LEAGUE_NAMES]
+    if unknown:
+        raise SystemExit(f"Unknown league(s): {', '.join(unknown)}. Choose from {', '.join(LEAGUE_NAMES)}.")
+    return leagues or ['NBA']
+
+
+def parse_spreads(lines):
+    """Spread lines 'HOME SPREAD' or 'HOME AWAY SPREAD' (commas or spaces) -> [(home, away or None, spread)]."""
+    spreads = []
+    for line in lines:
+        fields = line.replace(',', ' ').split()
+        if len(fields) not in (2, 3):
+            raise SystemExit(f"Cannot read spread line '{line}': expected 'HOME SPREAD' or 'HOME AWAY SPREAD'.")
+        home, away = fields[0].upper(), fields[1].upper() if len(fields) == 3 else None
+        try:
+            spreads.append((home, away, float(fields[-1])))
+        except ValueError:
+            raise SystemExit(f"Cannot read spread line '{line}': '{fields[-1]}' is not a number.")
+    return spreads
+
+
+# --- Subcommands ---
+def run_step(args):
+    import runpy
+
+    for league in requested_leagues(args):
+        if getattr(args, 'ensemble', False):
+            # Called in-process: the ensemble's worker pool needs a __main__ that is safe to re-import
+            from horizon_ensemble import train_league
+            print(f"\n=== ball train --ensemble {league}: horizon_ensemble.py ===")
+            train_league(league)
+            continue
+        script = STEP_SCRIPTS[args.command][league]
+        if script is None:
+            print(f"'{args.command}' has no {league} script; skipping {league}.")
+            continue
+        print(f"\n=== ball {args.command} {league}: {script} ===")
+        runpy.run_path(os.path.join(SCRIPT_DIR, script), run_name='__main__')
+
+
+def run_forecast(args):
+    from forecast_today import predict_games, make_forecast, report_forecasts
+
+    spreads = parse_spreads(read_lines(args.spreads)) if args.spreads else []
+    for league in requested_leagues(args):
+        try:
+            # With both teams on every line the matchups are known, so no schedule lookup is needed
+            matchups = [(home, away) for home, away, _ in spreads] if spreads and all(away for _, away, _ in spreads) else None
+            predicted_games = predict_games(league, matchups)
+            if not predicted_games:
+                print(f"No {league} games to forecast.")
+                continue
+
+            by_home = {home: spread for home, _, spread in spreads}
+            forecasts = []
+            for home_team_abbr, away_team_abbr, predicted_diff in predicted_games:
+                if home_team_abbr not in by_home:
+                    print(f"{away_team_abbr} at {home_team_abbr}: predicted {home_team_abbr} by {predicted_diff:.1f} (no spread given)")
+                    continue
+                forecasts.append(make_forecast(league, home_team_abbr, away_team_abbr, predicted_diff, by_home[home_team_abbr]))
+            if spreads:
+                report_forecasts(league, forecasts, args.log)
+        except FileNotFoundError as e:
+            print(f"ERROR: Could not find required file: {e.filename}")
+        except Exception as e:
+            print(f"An unexpected error occurred: {e}")
+    if args.timing:
+        print(f"\nForecast finished in {(time.perf_counter() - STARTED) * 1000:.0f} ms.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='ball', description="NBA/WNBA spread model pipeline.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for command, help_text in (('collect', "download game logs"), ('features', "build EWMA features"),
+                               ('train', "train the final model"), ('tune', "grid-search the model"),
+                               ('backtest', "backtest the betting strategy"), ('inspect', "explain the model")):
+        step = subparsers.add_parser(command, help=help_text)
+        step.add_argument('leagues', nargs='*', metavar='LEAGUE', help="NBA and/or WNBA (default NBA)")
+        step.add_argument('--batch', metavar='FILE', help="read leagues from FILE, one per line ('-' for stdin)")
+        if command == 'train':
+            step.add_argument('--ensemble', action='store_true',
+                              help="train the multi-horizon stacked ensemble instead (horizon_ensemble.py)")
+        step.set_defaults(handler=run_step)
+
+    forecast = subparsers.add_parser('forecast', help="forecast today's games against spreads")
+    forecast.add_argument('leagues', nargs='*', metavar='LEAGUE', help="NBA and/or WNBA (default NBA)")
+    forecast.add_argument('--batch', metavar='FILE', help="read leagues from FILE, one per line ('-' for stdin)")
+    forecast.add_argument('--spreads', metavar='FILE',
+                          help="spread lines 'HOME SPREAD' or 'HOME AWAY SPREAD' from FILE ('-' for stdin); "
+                               "without it the predictions are only printed")
+    forecast.add_argument('--log', default='prediction_log.csv', help="prediction log to append to")
+    forecast.add_argument('--timing', action='store_true', help="print how long the forecast took")
+    forecast.set_defaults(handler=run_forecast)
+    return parser
+
+
+# --- Main Script ---
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    args.handler(args)
@@ -0,0 +1,71 @@
+import pandas as pd
+import numpy as np
+import os
+import tempfile
+import time
+from sklearn.metrics import mean_absolute_error
+from model_backends import BACKENDS, fit_model, save_model, load_model, predict
+
+# --- Configuration ---
+EWMA_FEATURE_FILE = "nba_games_ewma_features.csv" # Or "wnba_games_ewma_features.csv"
+TEST_SIZE = 0.2
+SINGLE_GAME_REPEATS = 50 # Single-row predictions timed, like forecast_today.py makes them
+
+# --- Main Script ---
+print("--- Model Backend Benchmark ---")
+print(f"Loading feature data from '{EWMA_FEATURE_FILE}'...")
+try:
+    df = pd.read_csv(EWMA_FEATURE_FILE)
+    df['GAME_DATE_home'] = pd.to_datetime(df['GAME_DATE_home'])
+    df = df.sort_values('GAME_DATE_home')
+
+    features = [col for col in df.columns if col.endswith('_diff')]
+    split_index = int(len(df) * (1 - TEST_SIZE))
+    X_train, X_test = df[features].iloc[:split_index], df[features].iloc[split_index:]
+    y_train, y_test = df['point_differential'].iloc[:split_index], df['point_differential'].iloc[split_index:]
+    print(f"{len(X_train)} games for training, {len(X_test)} games for testing, {len(features)} features.")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for backend in BACKENDS:
+            print(f"\nBenchmarking '{backend}'...")
+
+            # 1. FIT TIME
+            start = time.perf_counter()
+            model = fit_model(backend, X_train, y_train)
+            fit_seconds = time.perf_counter() - start
+
+            # 2. ARTIFACT SIZE (saved and reloaded the way forecast_today.py loads it)
+            artifact = os.path.join(tmp_dir, f"{backend}.joblib")
+            save_model(model, artifact)
+            model = load_model(artifact)
+
+            # 3. PREDICT LATENCY: the whole test set in one call, and one game at a time
+            start = time.perf_counter()
+            predictions = predict(model, X_test)
+            batch_ms = (time.perf_counter() - start) * 1000
+            single_ms = []
+            for i in range(min(SINGLE_GAME_REPEATS, len(X_test))):
+                start = time.perf_counter()
+                predict(model, X_test.iloc[[i]])
+                single_ms.append((time.perf_counter() - start) * 1000)
+
+            results.append({
+                'Backend': backend,
+                'Fit (s)': fit_seconds,
+                'Artifact (MB)': os.path.getsize(artifact) / 1e6,
+                'Batch Predict (ms)': batch_ms,
+                'Single Game (ms)': float(np.median(single_ms)),
+                'Test MAE': mean_absolute_error(y_test, predictions)
+            })
+
+    # 4. REPORT
+    results_df = pd.DataFrame(results)
+    print("\n--- Backend Comparison ---")
+    print(results_df.to_string(index=False, float_format='{:.3f}'.format))
+
+except FileNotFoundError:
+    print(f"ERROR: The file '{EWMA_FEATURE_FILE}' was not found.")
+    print("Please run 'feature_engineering_final.py' script first.")
+except Exception as e:
+    print(f"An unexpected error occurred: {e}")
@@ -2,7 +2,7 @@ import pandas as pd
 
 # --- Configuration ---
 RAW_DATA_FILE = "nba_games_raw.csv"
-PLAYER_DATA_FILE = "nba_games_with_players.csv" # The output from the script that just finished
+PLAYER_DATA_FILE = "nba_games_with_players.csv" # The output of player_aggregation.py
 OUTPUT_FILE = "nba_games_master_features.csv"
 ROLLING_WINDOW = 10
 
@@ -87,6 +87,6 @@ try:
 
 except FileNotFoundError as e:
     print(f"\nERROR: Could not find a required file. Make sure '{e.filename}' exists.")
-    print("You may need to run previous scripts.")
+    print("You may need to run previous scripts (e.g. 'player_aggregation.py').")
 except Exception as e:
     print(f"An unexpected error occurred: {e}")
\ No newline at end of file
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import joblib
+import hashlib
+import os
+import pickle
+import time
+from scipy.cluster.hierarchy import linkage, fcluster
+from scipy.spatial.distance import squareform
+from sklearn.metrics import mean_absolute_error
+from model_attribution import ATTRIBUTION_CACHE_DIR, data_checksum, permutation_importance
+from model_backends import make_model
+
+# Shared feature pruning for train_final_model.py and tune_model_wnba.py.
+# The selected feature list and dtype are stored on the model as feature_schema_, and
+# feature_names_in_ already lists the kept '<STAT>_diff' columns, so forecast_today.py
+# only has to compute the EWMAs of those stats.
+
+
+def correlation_clusters(X, correlation_threshold):
+    """Groups features whose absolute correlation is above the threshold (average-linkage clustering)."""
+    distance = 1 - X.corr().abs().fillna(0).to_numpy()
+    np.fill_diagonal(distance, 0)
+    labels = fcluster(linkage(squareform(distance, checks=False), method='average'),
+                      t=1 - correlation_threshold, criterion='distance')
+    return pd.Series(labels, index=X.columns)
+
+
+def timed_fit(model_factory, X, y):
+    model = model_factory()
+    start = time.perf_counter()
+    model.fit(X, y)
+    return model, time.perf_counter() - start
+
+
+def select_features(X, y, model_factory=lambda: make_model('forest'), validation_fraction=0.2,
+                    correlation_threshold=0.8, mae_budget=0.05):
+    """Picks a reduced float32 feature set that stays within mae_budget of the full set on a time-ordered validation slice.
+
+    X must be sorted chronologically. Importances are permutation importances of a full-feature
+    model on the validation slice; they and the final selection are cached per data checksum.
+    Returns (selected_features, report).
+    """
+    settings = repr((validation_fraction, correlation_threshold, mae_budget, sorted(model_factory().get_params().items())))
+    settings_key = hashlib.sha256(settings.encode()).hexdigest()[:16]
+    cache_file = os.path.join(ATTRIBUTION_CACHE_DIR, f"selection_{data_checksum(X, y)}_{settings_key}.joblib")
+    if os.path.exists(cache_file):
+        selected, report = joblib.load(cache_file)
+        print_report(report, cached=True)
+        return selected, report
+
+    split_index = int(len(X) * (1 - validation_fraction))
+    X_fit, X_val = X.iloc[:split_index], X.iloc[split_index:]
+    y_fit, y_val = y.iloc[:split_index], y.iloc[split_index:]
+
+    # 1. BASELINE: ALL FEATURES IN FLOAT64
+    baseline, baseline_seconds = timed_fit(model_factory, X_fit, y_fit)
+    baseline_mae = mean_absolute_error(y_val, baseline.predict(X_val))
+    importance = permutation_importance(baseline, X_val, y_val).set_index('Feature')['MAE Increase']
+
+    # 2. ONE REPRESENTATIVE (THE MOST IMPORTANT) PER CORRELATED CLUSTER
+    clusters = correlation_clusters(X_fit, correlation_threshold)
+    best_per_cluster = importance.groupby(clusters.reindex(importance.index)).idxmax()
+    representatives = list(importance[best_per_cluster.values].sort_values(ascending=False).index)
+
+    # 3. SMALLEST TOP-K OF THE REPRESENTATIVES THAT STAYS WITHIN THE MAE BUDGET
+    selected, pruned_mae, pruned_seconds, pruned_model = list(X.columns), baseline_mae, baseline_seconds, baseline
+    for k in range(1, len(representatives) + 1):
+        candidate = representatives[:k]
+        model, seconds = timed_fit(model_factory, X_fit[candidate].astype(np.float32), y_fit)
+        mae = mean_absolute_error(y_val, model.predict(X_val[candidate].astype(np.float32)))
+        if mae <= baseline_mae + mae_budget:
+            selected, pruned_mae, pruned_seconds, pruned_model = candidate, mae, seconds, model
+            break
+
+    report = {
+        'features_before': X.shape[1], 'features_after': len(selected), 'clusters': int(clusters.nunique()),
+        'baseline_mae': baseline_mae, 'pruned_mae': pruned_mae, 'mae_delta': pruned_mae - baseline_mae,
+        'baseline_fit_seconds': baseline_seconds, 'pruned_fit_seconds': pruned_seconds,
+        'baseline_data_bytes': int(X_fit.to_numpy(dtype=np.float64).nbytes),
+        'pruned_data_bytes': int(X_fit[selected].to_numpy(dtype=np.float32).nbytes),
+        'baseline_model_bytes': len(pickle.dumps(baseline)), 'pruned_model_bytes': len(pickle.dumps(pruned_model))
+    }
+    os.makedirs(ATTRIBUTION_CACHE_DIR, exist_ok=True)
+    joblib.dump((selected, report), cache_file)
+    print_report(report)
+    return selected, report
+
+
+def print_report(report, cached=False):
+    print(f"\n--- Feature Pruning Report{' (cached)' if cached else ''} ---")
+    print(f"Features: {report['features_before']} -> {report['features_after']} ({report['clusters']} correlation clusters)")
+    print(f"Validation MAE: {report['baseline_mae']:.2f} -> {report['pruned_mae']:.2f} (delta {report['mae_delta']:+.2f})")
+    print(f"Fit time: {report['baseline_fit_seconds']:.2f}s -> {report['pruned_fit_seconds']:.2f}s")
+    print(f"Training matrix: {report['baseline_data_bytes'] / 1e6:.2f} MB -> {report['pruned_data_bytes'] / 1e6:.2f} MB")
+    print(f"Model size: {report['baseline_model_bytes'] / 1e6:.2f} MB -> {report['pruned_model_bytes'] / 1e6:.2f} MB")
@@ -1,135 +1,188 @@
-import pandas as pd
-import joblib
-from nba_api.stats.endpoints import scoreboardv2
-import sys
+import csv
 import os
+import sys
+import time
+from matchup_table import LEAGUES, latest_team_states, load_matchup_table, predicted_margin
+from gameday_scheduler import LEAGUE_IDS, load_precomputed_games
 
-# --- Universal Helper Function ---
-def calculate_latest_ewma(historical_df, team_abbr, alpha=0.1):
-    """Calculates the most recent EWMA stats for a single team."""
-    team_df = historical_df[historical_df['TEAM_ABBREVIATION'] == team_abbr].copy()
-    if team_df.empty:
-        # FINAL FIX: Return only None, not a tuple
-        return None
-    
-    team_df.sort_values(by='GAME_DATE', inplace=True)
-    stats_to_average = ['FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
-                        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB',
-                        'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS']
-    
-    for stat in stats_to_average:
-        team_df[f'{stat}_ewma'] = team_df[stat].ewm(alpha=alpha, adjust=False).mean()
-        
-    # FINAL FIX: Return only the data Series, not a tuple
-    return team_df.iloc[-1][[f'{stat}_ewma' for stat in stats_to_average]]
-
-# --- Main Script ---
-print("--- Unified Game Forecaster (Production Version) ---")
-
-# 1. CHOOSE THE LEAGUE
-league_choice = input("Which league would you like to predict? (NBA/WNBA): ").strip().upper()
-
-if league_choice == 'NBA':
-    MODEL_FILE = "nba_model_tuned.joblib"
-    HISTORICAL_RAW_DATA = "nba_games_raw.csv"
-    LEAGUE_ID = '00'
-elif league_choice == 'WNBA':
-    MODEL_FILE = "wnba_model_tuned.joblib"
-    HISTORICAL_RAW_DATA = "wnba_games_raw.csv"
-    LEAGUE_ID = '10'
-else:
-    print("Invalid choice. Please enter 'NBA' or 'WNBA'.")
-    sys.exit()
+# pandas, the model and nba_api are imported only on the paths that need them, so a forecast
+# answered from gameday_predictions.json or the matchup table starts in a fraction of a second.
 
+# --- Configuration ---
 PREDICTION_LOG_FILE = 'prediction_log.csv'
-
-try:
-    # 2. LOAD MODEL AND DATA
-    print(f"\nLoading {league_choice} tuned model from '{MODEL_FILE}'...")
-    model = joblib.load(MODEL_FILE)
-    historical_df = pd.read_csv(HISTORICAL_RAW_DATA)
-    historical_df['GAME_DATE'] = pd.to_datetime(historical_df['DATE'])
-
-    # 3. BUILD THE TEAM ID -> ABBREVIATION TRANSLATOR
-    team_id_map = historical_df[['TEAM_ID', 'TEAM_ABBREVIATION']].drop_duplicates().set_index('TEAM_ID')['TEAM_ABBREVIATION'].to_dict()
-
-    # 4. GET TODAY'S GAMES
-    print(f"Fetching today's {league_choice} schedule...")
-    games = scoreboardv2.ScoreboardV2(league_id=LEAGUE_ID).get_data_frames()[0]
-    
-    if games.empty:
-        print(f"No {league_choice} games scheduled for today.")
-        sys.exit()
-
-    # 5. PROCESS GAMES AND GENERATE PREDICTIONS
-    predictions_today = []
-    for index, game in games.iterrows():
-        home_team_id = game['HOME_TEAM_ID']
-        away_team_id = game['VISITOR_TEAM_ID']
-        home_team_abbr = team_id_map.get(home_team_id)
-        away_team_abbr = team_id_map.get(away_team_id)
-
-        if not home_team_abbr or not away_team_abbr:
-            print(f"\nSkipping game with ID {game['GAME_ID']}. Reason: Unknown Team ID. Home: {home_team_id}, Away: {away_team_id}")
-            continue
-            
-        print(f"\nProcessing game: {away_team_abbr} at {home_team_abbr}")
-
-        home_stats = calculate_latest_ewma(historical_df, home_team_abbr)
-        away_stats = calculate_latest_ewma(historical_df, away_team_abbr)
-        
-        if home_stats is None or away_stats is None:
-            print(f"Skipping game due to missing historical data.")
-            continue
-
-        # Subtraction now works because home_stats and away_stats are Series, not tuples
-        diff_stats = home_stats - away_stats
-        
-        # Create a DataFrame with the correct column names for a robust prediction
-        features_for_model = pd.DataFrame([diff_stats.values], columns=model.feature_names_in_)
-        
-        predicted_diff = model.predict(features_for_model)[0]
-
-        try:
-            vegas_spread_str = input(f"Enter Vegas Spread for {home_team_abbr} (e.g., -5.5, or 'skip'): ")
-            if vegas_spread_str.lower() == 'skip': continue
-            vegas_spread = float(vegas_spread_str)
-        except ValueError:
-            print("Invalid input. Skipping game.")
-            continue
-
-        edge = predicted_diff - vegas_spread
-        recommendation = "No Bet"
-        if edge > 3.0: recommendation = f"Bet on {home_team_abbr} (Spread: {vegas_spread})"
-        if edge < -3.0: recommendation = f"Bet on {away_team_abbr} (Spread: {'+' if -vegas_spread > 0 else ''}{-vegas_spread})"
-
-        game_prediction = {
-            "Date": pd.Timestamp.today().strftime('%Y-%m-%d'), "League": league_choice,
-            "Home Team": home_team_abbr, "Away Team": away_team_abbr,
-            "Model Prediction": f"{home_team_abbr} by {predicted_diff:.1f}",
-            "Vegas Spread": f"{home_team_abbr} by {vegas_spread:.1f}",
-            "Edge": f"{edge:.1f}", "Recommendation": recommendation,
-            "Actual Result": "Pending"
-        }
-        predictions_today.append(game_prediction)
-
-    # 6. DISPLAY AND SAVE RESULTS
-    if predictions_today:
-        results_df = pd.DataFrame(predictions_today)
-        print(f"\n--- Today's {league_choice} Forecasts ---")
-        print(results_df.to_string())
-
-        if os.path.exists(PREDICTION_LOG_FILE):
-            log_df = pd.read_csv(PREDICTION_LOG_FILE)
-            log_df = pd.concat([log_df, results_df], ignore_index=True)
-        else:
-            log_df = results_df
-        log_df.to_csv(PREDICTION_LOG_FILE, index=False)
-        print(f"\nPredictions have been saved to '{PREDICTION_LOG_FILE}'")
+DISPLAY_COLUMNS = ["Date", "League", "Home Team", "Away Team", "Model Prediction",
+                   "Vegas Spread", "Edge", "Recommendation", "Actual Result"]
+# Unrounded numbers behind the display strings: settle_predictions.py grades from these
+VALUE_COLUMNS = ["Predicted Margin", "Spread Line", "Edge Points"]
+LOG_COLUMNS = DISPLAY_COLUMNS + VALUE_COLUMNS
+
+def predict_games(league, matchups=None):
+    """Predicted home margins as [(home, away, predicted_diff)], for today's schedule or for given (home, away) pairs.
+
+    Reads games precomputed by gameday_scheduler.py first, then the matchup table, and only
+    loads the model and the full history when neither can answer.
+    """
+    files = LEAGUES[league]
+
+    # 1. GAMES ALREADY PRECOMPUTED BY gameday_scheduler.py
+    precomputed_games = load_precomputed_games(league) or {}
+    precomputed = {(game['home'], game['away']): game['predicted_diff'] for game in precomputed_games.values()}
+    if precomputed_games:
+        print(f"\nUsing today's {league} games precomputed by 'gameday_scheduler.py'.")
+        if matchups is None:
+            matchups = []
+            for game_id, game in precomputed_games.items():
+                if not game['home'] or not game['away']:
+                    print(f"\nSkipping game with ID {game_id}. Reason: Unknown Team ID. Home: {game['home_team_id']}, Away: {game['away_team_id']}")
+                    continue
+                matchups.append((game['home'], game['away']))
+    if matchups is not None and all(precomputed.get(pair) is not None for pair in matchups):
+        return [(home, away, precomputed[(home, away)]) for home, away in matchups]
+
+    # 2. THE PRECOMPUTED MATCHUP TABLE IF IT IS FRESH, OTHERWISE THE MODEL AND DATA
+    matchup_table = load_matchup_table(files['table'], files['raw'], files['model'])
+    if matchup_table:
+        print(f"\nUsing precomputed {league} matchup table '{files['table']}' (data through {matchup_table['data_through']}).")
+        # 3. THE TEAM ID -> ABBREVIATION TRANSLATOR IS STORED WITH THE TABLE
+        team_id_map = {int(team_id): abbr for team_id, abbr in matchup_table['team_ids'].items()}
     else:
+        import pandas as pd
+        from model_backends import load_model, predict
+
+        print(f"\nLoading {league} tuned model from '{files['model']}'...")
+        model = load_model(files['model'])
+        historical_df = pd.read_csv(files['raw'])
+        historical_df['GAME_DATE'] = pd.to_datetime(historical_df['GAME_DATE'])
+
+        # 3. BUILD THE TEAM ID -> ABBREVIATION TRANSLATOR
+        team_id_map = historical_df[['TEAM_ID', 'TEAM_ABBREVIATION']].drop_duplicates().set_index('TEAM_ID')['TEAM_ABBREVIATION'].to_dict()
+
+    # 4. GET TODAY'S GAMES (unless the caller named the matchups)
+    if matchups is None:
+        from nba_api.stats.endpoints import scoreboardv2
+
+        print(f"Fetching today's {league} schedule...")
+        games = scoreboardv2.ScoreboardV2(league_id=LEAGUE_IDS[league]).get_data_frames()[0]
+        matchups = []
+        for index, game in games.iterrows():
+            home_team_abbr = team_id_map.get(game['HOME_TEAM_ID'])
+            away_team_abbr = team_id_map.get(game['VISITOR_TEAM_ID'])
+            if not home_team_abbr or not away_team_abbr:
+                print(f"\nSkipping game with ID {game['GAME_ID']}. Reason: Unknown Team ID. Home: {game['HOME_TEAM_ID']}, Away: {game['VISITOR_TEAM_ID']}")
+                continue
+            matchups.append((home_team_abbr, away_team_abbr))
+
+    # 5. PREDICT EACH MATCHUP (the model scores the whole slate in one batched call)
+    if not matchup_table:
+        # Each team's current vector in the model's own layout: only the EWMAs a pruned model uses,
+        # or every horizon of an ensemble
+        states = latest_team_states(model, historical_df)
+        known = [(home, away) for home, away in matchups if precomputed.get((home, away)) is None
+                 and home in states.index and away in states.index]
+        diffs = states.loc[[home for home, _ in known]].to_numpy() - states.loc[[away for _, away in known]].to_numpy()
+        model_predictions = dict(zip(known, predict(model, pd.DataFrame(diffs, columns=states.columns)))) if known else {}
+
+    predicted_games = []
+    for home_team_abbr, away_team_abbr in matchups:
+        if precomputed.get((home_team_abbr, away_team_abbr)) is not None:
+            predicted_diff = precomputed[(home_team_abbr, away_team_abbr)]
+        elif matchup_table:
+            predicted_diff = predicted_margin(matchup_table, home_team_abbr, away_team_abbr)
+            if predicted_diff is None:
+                print(f"\nSkipping {away_team_abbr} at {home_team_abbr}: matchup not found in the precomputed table.")
+                continue
+        else:
+            predicted_diff = model_predictions.get((home_team_abbr, away_team_abbr))
+            if predicted_diff is None:
+                print(f"\nSkipping {away_team_abbr} at {home_team_abbr} due to missing historical data.")
+                continue
+        predicted_games.append((home_team_abbr, away_team_abbr, predicted_diff))
+    return predicted_games
+
+
+def make_forecast(league, home_team_abbr, away_team_abbr, predicted_diff, vegas_spread):
+    """One prediction log row: the model's margin against the spread and the resulting recommendation."""
+    edge = predicted_diff - vegas_spread
+    recommendation = "No Bet"
+    if edge > 3.0: recommendation = f"Bet on {home_team_abbr} (Spread: {vegas_spread})"
+    if edge < -3.0: recommendation = f"Bet on {away_team_abbr} (Spread: {'+' if -vegas_spread > 0 else ''}{-vegas_spread})"
+
+    return {
+        "Date": time.strftime('%Y-%m-%d'), "League": league,
+        "Home Team": home_team_abbr, "Away Team": away_team_abbr,
+        "Model Prediction": f"{home_team_abbr} by {predicted_diff:.1f}",
+        "Vegas Spread": f"{home_team_abbr} by {vegas_spread:.1f}",
+        "Edge": f"{edge:.1f}", "Recommendation": recommendation,
+        "Actual Result": "Pending",
+        "Predicted Margin": float(predicted_diff), "Spread Line": float(vegas_spread), "Edge Points": float(edge)
+    }
+
+
+def report_forecasts(league, forecasts, log_file=PREDICTION_LOG_FILE):
+    """Prints the forecasts as a table and appends them to the prediction log."""
+    if not forecasts:
         print("\nNo predictions were generated.")
+        return
+
+    widths = {column: max(len(column), *(len(row[column]) for row in forecasts)) for column in DISPLAY_COLUMNS}
+    print(f"\n--- Today's {league} Forecasts ---")
+    print("  ".join(column.rjust(widths[column]) for column in DISPLAY_COLUMNS))
+    for row in forecasts:
+        print("  ".join(row[column].rjust(widths[column]) for column in DISPLAY_COLUMNS))
+
+    # Append rather than rewrite: settle_predictions.py moves graded rows out of this log.
+    # A log started before the value columns existed is rewritten once with the full header.
+    write_header = not os.path.exists(log_file)
+    if not write_header:
+        with open(log_file, newline='') as f:
+            reader = csv.DictReader(f)
+            old_rows = list(reader) if reader.fieldnames != LOG_COLUMNS else None
+        if old_rows is not None:
+            with open(log_file, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=LOG_COLUMNS, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(old_rows)
+    with open(log_file, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=LOG_COLUMNS)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(forecasts)
+    print(f"\nPredictions have been saved to '{log_file}'")
+    print("Run 'settle_predictions.py' after the games finish to grade them.")
+
+
+# --- Main Script ---
+if __name__ == "__main__":
+    print("--- Unified Game Forecaster (Production Version) ---")
+
+    # 1. CHOOSE THE LEAGUE
+    league_choice = input("Which league would you like to predict? (NBA/WNBA): ").strip().upper()
+    if league_choice not in LEAGUES:
+        print("Invalid choice. Please enter 'NBA' or 'WNBA'.")
+        sys.exit()
 
-except FileNotFoundError as e:
-    print(f"ERROR: Could not find required file: {e.filename}")
-except Exception as e:
-    print(f"An unexpected error occurred: {e}")
\ No newline at end of file
+    try:
+        predicted_games = predict_games(league_choice)
+        if not predicted_games:
+            print(f"No {league_choice} games scheduled for today.")
+            sys.exit()
+
+        # 6. ASK FOR EACH SPREAD, THEN DISPLAY AND SAVE RESULTS
+        forecasts = []
+        for home_team_abbr, away_team_abbr, predicted_diff in predicted_games:
+            print(f"\nProcessing game: {away_team_abbr} at {home_team_abbr}")
+            try:
+                vegas_spread_str = input(f"Enter Vegas Spread for {home_team_abbr} (e.g., -5.5, or 'skip'): ")
+                if vegas_spread_str.lower() == 'skip': continue
+                vegas_spread = float(vegas_spread_str)
+            except ValueError:
+                print("Invalid input. Skipping game.")
+                continue
+            forecasts.append(make_forecast(league_choice, home_team_abbr, away_team_abbr, predicted_diff, vegas_spread))
+
+        report_forecasts(league_choice, forecasts)
+
+    except FileNotFoundError as e:
+        print(f"ERROR: Could not find required file: {e.filename}")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
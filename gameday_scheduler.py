@@ -0,0 +1,289 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+# --- Configuration ---
+# Polls both leagues' scoreboards in the background and keeps every scheduled game's features and
+# prediction ready before tip-off, so forecast_today.py only has to read GAMEDAY_FILE at game time.
+LEAGUE_IDS = {'NBA': '00', 'WNBA': '10'}
+# Point this at a local fake endpoint (same JSON layout as stats.nba.com) to exercise the scheduler offline
+SCOREBOARD_URL = os.environ.get('SCOREBOARD_URL', "https://stats.nba.com/stats/scoreboardv2")
+POLL_SECONDS = 300            # How often the scheduler wakes up
+SCOREBOARD_TTL_SECONDS = 240  # A cached scoreboard younger than this is used without any request
+LOOKAHEAD_DAYS = 1            # Also precompute tomorrow's slate
+REQUEST_TIMEOUT = 30
+TEAM_INDEX_FILE = "team_id_index.json"
+GAMEDAY_FILE = "gameday_predictions.json"
+SCHEDULED_STATUS = 1          # GAME_STATUS_ID of games that have not tipped off yet
+
+# Today's and tomorrow's polls of a league run in parallel threads; only one of them should (re)load its files
+_sources_lock = threading.Lock()
+
+
+# --- Helper Functions ---
+def write_json(data, path):
+    """Writes atomically, so a forecast reading the file never sees half of it."""
+    temp_file = f"{path}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(data, f, indent=1)
+    os.replace(temp_file, path)
+
+
+def read_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def fetch_scoreboard(league_id, game_date, cache, ttl=None, url=None):
+    """Scoreboard JSON for one league and day, with TTL and ETag caching.
+
+    Within the TTL the cached copy is returned without a request. After it, the request carries the
+    cached ETag, and a 304 Not Modified answer just renews the cached copy. Returns (payload, source).
+    ttl and url default to SCOREBOARD_TTL_SECONDS and SCOREBOARD_URL as they are at call time.
+    """
+    import requests
+    from nba_api.stats.library.http import STATS_HEADERS
+
+    ttl = SCOREBOARD_TTL_SECONDS if ttl is None else ttl
+    url = url or SCOREBOARD_URL
+    key = f"{league_id}/{game_date}"
+    entry = cache.get(key)
+    if entry and time.time() - entry['fetched_at'] < ttl:
+        return entry['payload'], 'cache'
+
+    # Host is left to requests so the URL can point anywhere
+    headers = {name: value for name, value in STATS_HEADERS.items() if name != 'Host'}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    response = requests.get(url, params={'GameDate': game_date, 'LeagueID': league_id, 'DayOffset': 0},
+                            headers=headers, timeout=REQUEST_TIMEOUT)
+
+    if response.status_code == 304 and entry:
+        entry['fetched_at'] = time.time()
+        return entry['payload'], 'not modified'
+    response.raise_for_status()
+    cache[key] = {'payload': response.json(), 'etag': response.headers.get('ETag'), 'fetched_at': time.time()}
+    return cache[key]['payload'], 'fetched'
+
+
+def result_set(payload, name):
+    """Rows of one named result set of a stats.nba.com response, as dicts."""
+    for result in payload.get('resultSets', []):
+        if result['name'] == name:
+            return [dict(zip(result['headers'], row)) for row in result['rowSet']]
+    return []
+
+
+def seed_team_index(league):
+    """First TEAM_ID -> abbreviation map for a league, from the matchup table or, failing that, the raw data."""
+    from matchup_table import LEAGUES
+
+    files = LEAGUES[league]
+    table = read_json(files['table'])
+    if table.get('team_ids'):
+        return dict(table['team_ids'])
+    if os.path.exists(files['raw']):
+        import pandas as pd
+        raw = pd.read_csv(files['raw'], usecols=['TEAM_ID', 'TEAM_ABBREVIATION', 'GAME_DATE'])
+        latest = raw.sort_values('GAME_DATE').drop_duplicates('TEAM_ID', keep='last')
+        return {str(team_id): abbr for team_id, abbr in zip(latest['TEAM_ID'], latest['TEAM_ABBREVIATION'])}
+    return {}
+
+
+def update_team_index(team_index, league, payload):
+    """Adds the teams named in a scoreboard's LineScore; returns True if the index changed."""
+    league_teams = team_index.setdefault(league, {})
+    changed = False
+    for row in result_set(payload, 'LineScore'):
+        team_id, abbr = str(row['TEAM_ID']), row['TEAM_ABBREVIATION']
+        if abbr and league_teams.get(team_id) != abbr:
+            league_teams[team_id] = abbr
+            changed = True
+    return changed
+
+
+def load_prediction_sources(league, sources):
+    """Matchup table, model and point-in-time index for a league, reloaded only when one of their files changes."""
+    from matchup_table import LEAGUES, file_signature, load_matchup_table
+    import team_feature_index
+
+    files = LEAGUES[league]
+    index_file = team_feature_index.LEAGUES[league]['index']
+    with _sources_lock:
+        signature = [file_signature(path) if os.path.exists(path) else None
+                     for path in (files['table'], files['model'], files['raw'], index_file)]
+        cached = sources.get(league)
+        if cached and cached['signature'] == signature:
+            return cached
+
+        table = load_matchup_table(files['table'], files['raw'], files['model'])
+
+        index = None
+        if os.path.exists(index_file) and (not os.path.exists(files['raw'])
+                                           or os.path.getmtime(index_file) >= os.path.getmtime(files['raw'])):
+            index = team_feature_index.load_index(index_file)
+        elif os.path.exists(files['raw']):
+            import pandas as pd
+            print(f"{league}: rebuilding team feature index '{index_file}' from '{files['raw']}'...")
+            index = team_feature_index.build_index(pd.read_csv(files['raw']))
+            team_feature_index.save_index(index, index_file)
+            signature[3] = file_signature(index_file)
+
+        # The model is only needed when the table cannot answer
+        model, states = None, None
+        if table is None and os.path.exists(files['model']):
+            from model_backends import load_model
+            model = load_model(files['model'])
+            # Models with their own feature layout (the horizon ensemble) score from their own team states
+            if hasattr(model, 'team_states') and os.path.exists(files['raw']):
+                import pandas as pd
+                from matchup_table import latest_team_states
+                states = latest_team_states(model, pd.read_csv(files['raw']))
+
+        sources[league] = {'signature': signature, 'table': table, 'model': model, 'states': states, 'index': index}
+        return sources[league]
+
+
+def precompute_games(league, game_date, games, team_ids, sources):
+    """Feature vector and predicted home margin for each game, computed in one batch."""
+    from matchup_table import predicted_margin
+    from team_feature_index import matchup_features
+
+    source = load_prediction_sources(league, sources)
+    homes = [team_ids.get(str(game['HOME_TEAM_ID'])) for game in games]
+    aways = [team_ids.get(str(game['VISITOR_TEAM_ID'])) for game in games]
+
+    features = None
+    if source['index'] is not None:
+        # Strictly-before-date lookups, so tomorrow's slate never sees tomorrow's results
+        features = matchup_features(source['index'], homes, aways, [game_date] * len(games))
+
+    if source['table'] is not None:
+        predictions = [predicted_margin(source['table'], home, away) for home, away in zip(homes, aways)]
+        origin = 'matchup table'
+    elif source['states'] is not None:
+        import pandas as pd
+        from model_backends import predict
+        states = source['states']
+        known = [position for position, (home, away) in enumerate(zip(homes, aways)) if home in states.index and away in states.index]
+        predictions = [None] * len(games)
+        if known:
+            diffs = states.loc[[homes[position] for position in known]].to_numpy() - states.loc[[aways[position] for position in known]].to_numpy()
+            for position, margin in zip(known, predict(source['model'], pd.DataFrame(diffs, columns=states.columns))):
+                predictions[position] = round(float(margin), 3)
+        origin = 'model'
+    elif source['model'] is not None and features is not None:
+        from model_backends import predict
+        known = features.notna().all(axis=1)
+        predictions = [None] * len(games)
+        if known.any():
+            for position, margin in zip(known[known].index, predict(source['model'], features[known])):
+                predictions[position] = round(float(margin), 3)
+        origin = 'model'
+    else:
+        predictions = [None] * len(games)
+        origin = 'unavailable'
+
+    precomputed = {}
+    for position, (game, home, away) in enumerate(zip(games, homes, aways)):
+        row = features.iloc[position] if features is not None else None
+        precomputed[str(game['GAME_ID'])] = {
+            'home': home, 'away': away,
+            'home_team_id': game['HOME_TEAM_ID'], 'away_team_id': game['VISITOR_TEAM_ID'],
+            'status': game.get('GAME_STATUS_TEXT', '').strip(),
+            'predicted_diff': predictions[position],
+            'features': None if row is None or row.isna().any() else {name: round(float(value), 6) for name, value in row.items()},
+            'prediction_source': origin
+        }
+    return precomputed
+
+
+def load_precomputed_games(league, game_date=None, gameday_file=GAMEDAY_FILE):
+    """Precomputed games for a league and day, or None if the scheduler has not produced them."""
+    game_date = game_date or time.strftime('%Y-%m-%d')
+    return read_json(gameday_file).get(league, {}).get(game_date, {}).get('games')
+
+
+# --- Scheduler ---
+async def poll_league(league, game_date, state):
+    """Fetches one scoreboard off the event loop and refreshes that day's precomputed games if needed."""
+    payload, fetched_from = await asyncio.to_thread(fetch_scoreboard, LEAGUE_IDS[league], game_date, state['cache'])
+
+    if league not in state['team_index']:
+        state['team_index'][league] = await asyncio.to_thread(seed_team_index, league)
+        state['team_index_dirty'] = True
+    if update_team_index(state['team_index'], league, payload):
+        state['team_index_dirty'] = True
+
+    games = result_set(payload, 'GameHeader')
+    day = state['gameday'].setdefault(league, {}).get(game_date, {'games': {}})
+    stored = day['games']
+
+    # Games that already tipped off keep the prediction they were given; only scheduled games are (re)computed
+    pending = [game for game in games
+               if game.get('GAME_STATUS_ID', SCHEDULED_STATUS) == SCHEDULED_STATUS or str(game['GAME_ID']) not in stored]
+    for game in games:
+        if str(game['GAME_ID']) in stored:
+            stored[str(game['GAME_ID'])]['status'] = game.get('GAME_STATUS_TEXT', '').strip()
+
+    if pending:
+        fresh = await asyncio.to_thread(precompute_games, league, game_date, pending,
+                                        state['team_index'][league], state['sources'])
+        if 'computed_at' not in day or any(stored.get(game_id, {}).get('predicted_diff') != game['predicted_diff']
+                                           or stored.get(game_id, {}).get('features') != game['features']
+                                           for game_id, game in fresh.items()):
+            day['computed_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        stored.update(fresh)
+
+    day['polled_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    state['gameday'][league][game_date] = day
+    print(f"{league} {game_date}: {len(games)} games ({fetched_from}), {len(pending)} precomputed")
+
+
+async def run_cycle(state, leagues=LEAGUE_IDS, lookahead_days=LOOKAHEAD_DAYS):
+    """One poll of every league and day, all requests in flight at once, then one write of the results."""
+    dates = [time.strftime('%Y-%m-%d', time.localtime(time.time() + 86400 * offset)) for offset in range(lookahead_days + 1)]
+    tasks = [(league, game_date) for league in leagues for game_date in dates]
+    results = await asyncio.gather(*(poll_league(league, game_date, state) for league, game_date in tasks),
+                                   return_exceptions=True)
+    for (league, game_date), result in zip(tasks, results):
+        if isinstance(result, Exception):
+            print(f"{league} {game_date}: poll failed: {result}")
+
+    # Only keep the days still being polled, so the file stays small
+    for league in state['gameday']:
+        state['gameday'][league] = {game_date: day for game_date, day in state['gameday'][league].items() if game_date in dates}
+    write_json(state['gameday'], state['gameday_file'])
+    if state.pop('team_index_dirty', False):
+        write_json(state['team_index'], state['team_index_file'])
+
+
+async def run_scheduler(poll_seconds=POLL_SECONDS, cycles=None, gameday_file=GAMEDAY_FILE, team_index_file=TEAM_INDEX_FILE):
+    """Polls every poll_seconds until cancelled (or for a fixed number of cycles)."""
+    state = {
+        'cache': {}, 'sources': {},
+        'team_index': read_json(team_index_file), 'team_index_file': team_index_file,
+        'gameday': read_json(gameday_file), 'gameday_file': gameday_file
+    }
+    cycle = 0
+    while cycles is None or cycle < cycles:
+        start = time.perf_counter()
+        await run_cycle(state)
+        cycle += 1
+        print(f"Cycle {cycle} done in {time.perf_counter() - start:.2f}s -> '{gameday_file}'")
+        if cycles is None or cycle < cycles:
+            await asyncio.sleep(poll_seconds)
+
+
+# --- Main Script ---
+if __name__ == "__main__":
+    print("--- Game Day Scheduler ---")
+    print(f"Polling {', '.join(LEAGUE_IDS)} scoreboards at '{SCOREBOARD_URL}' every {POLL_SECONDS}s. Press Ctrl+C to stop.")
+    try:
+        asyncio.run(run_scheduler())
+    except KeyboardInterrupt:
+        print("\nScheduler stopped.")
@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error
+from threadpoolctl import threadpool_limits
+from model_backends import make_model, save_model
+
+# --- Configuration ---
+# feature_engineering_final.py smooths with one EWMA alpha and feature_engineering_v2.py with one rolling
+# window. The ensemble builds the box-score '_diff' features for several of each straight from the raw
+# game logs, fits one model per horizon, and lets a linear stacking layer weigh them.
+LEAGUES = {
+    'NBA': {'raw': "nba_games_raw.csv", 'model': "nba_model_ensemble.joblib"},
+    'WNBA': {'raw': "wnba_games_raw.csv", 'model': "wnba_model_ensemble.joblib"}
+}
+# To forecast with an ensemble, point the league's 'model' in matchup_table.LEAGUES at its file.
+STATS_TO_AVERAGE = ['FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+                    'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB',
+                    'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS']
+ENSEMBLE_ALPHAS = [0.05, 0.1, 0.2, 0.3]
+ENSEMBLE_WINDOWS = [5, 10, 20]
+ENSEMBLE_BACKEND = "forest" # Base model for every horizon (see model_backends.py)
+ENSEMBLE_FOLDS = 4          # Expanding-window folds for the out-of-fold predictions the stacker learns from
+ENSEMBLE_WORKERS = None     # Worker processes; None = one per core
+TEST_SIZE = 0.2
+
+
+# --- Helper Functions ---
+def horizon_name(horizon):
+    kind, param = horizon
+    return f'ewm{param:g}' if kind == 'ewm' else f'roll{param}'
+
+
+def make_horizons(alphas=ENSEMBLE_ALPHAS, windows=ENSEMBLE_WINDOWS):
+    return [('ewm', alpha) for alpha in alphas] + [('rolling', window) for window in windows]
+
+
+def horizon_columns(horizon, stats=STATS_TO_AVERAGE):
+    return [f'{stat}_{horizon_name(horizon)}_diff' for stat in stats]
+
+
+def team_horizon_states(raw_df, horizons, stats=STATS_TO_AVERAGE, shift=True):
+    """Every team's smoothed stats after each of its games, for every horizon, in one frame.
+
+    With shift=True a row only sees the team's earlier games (training features, as in
+    feature_engineering_final.py); with shift=False it includes the game itself (current state).
+    """
+    df = raw_df.copy()
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
+    df = df.sort_values(['TEAM_ABBREVIATION', 'GAME_DATE'], kind='mergesort')
+    values = df.groupby('TEAM_ABBREVIATION', sort=False)[stats].shift(1) if shift else df[stats]
+    grouped = values.groupby(df['TEAM_ABBREVIATION'], sort=False)
+
+    states = []
+    for horizon in horizons:
+        kind, param = horizon
+        smoothed = (grouped.ewm(alpha=param, adjust=False).mean() if kind == 'ewm'
+                    else grouped.rolling(param, min_periods=1).mean())
+        smoothed = smoothed.reset_index(level=0, drop=True).reindex(df.index)
+        smoothed.columns = horizon_columns(horizon, stats)
+        states.append(smoothed)
+    return df, pd.concat(states, axis=1)
+
+
+def build_horizon_features(raw_df, horizons, stats=STATS_TO_AVERAGE):
+    """One row per game with home-minus-away features for every horizon and the point_differential target."""
+    df, states = team_horizon_states(raw_df, horizons, stats, shift=True)
+    columns = list(states.columns)
+    df = pd.concat([df[['GAME_ID', 'GAME_DATE', 'TEAM_ABBREVIATION', 'MATCHUP', 'PLUS_MINUS']], states], axis=1)
+    # Drop each team's first game, which has no history for any horizon
+    df = df.dropna(subset=columns)
+
+    away_games = df[df['MATCHUP'].str.contains('@')].add_suffix('_away')
+    home_games = df[~df['MATCHUP'].str.contains('@')].add_suffix('_home')
+    merged = pd.merge(home_games, away_games, left_on='GAME_ID_home', right_on='GAME_ID_away')
+
+    features = pd.DataFrame(merged[[f'{column}_home' for column in columns]].to_numpy()
+                            - merged[[f'{column}_away' for column in columns]].to_numpy(), columns=columns)
+    final_df = pd.concat([merged[['GAME_ID_home', 'GAME_DATE_home', 'TEAM_ABBREVIATION_home', 'TEAM_ABBREVIATION_away']],
+                          features, merged['PLUS_MINUS_home'].rename('point_differential')], axis=1)
+    return final_df.sort_values('GAME_DATE_home', kind='mergesort').reset_index(drop=True)
+
+
+def share_array(array):
+    """Copies an array into a new shared-memory block; returns the block and what a worker needs to map it."""
+    memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[:] = array
+    return memory, {'name': memory.name, 'shape': array.shape, 'dtype': array.dtype.str}
+
+
+def fit_horizon_task(task):
+    """Worker: fits one horizon's base model on a time slice of the shared arrays, without copying them.
+
+    Returns (horizon index, fold, fitted model, predictions for the next time block). Only the final
+    fit (fold None) sends its model back; a fold's model is never used, so it is not pickled.
+    """
+    blocks = [shared_memory.SharedMemory(name=task[name]['name']) for name in ('X', 'y')]
+    try:
+        X = np.ndarray(task['X']['shape'], dtype=task['X']['dtype'], buffer=blocks[0].buf)
+        y = np.ndarray(task['y']['shape'], dtype=task['y']['dtype'], buffer=blocks[1].buf)
+        columns = slice(*task['columns'])
+        # One thread per worker: the pool, not the estimator, spreads the work over the cores
+        with threadpool_limits(1):
+            model = make_model(task['backend'], **task['params'])
+            model.fit(X[:task['train_end'], columns], y[:task['train_end']])
+            predictions = (model.predict(X[task['train_end']:task['predict_end'], columns])
+                           if task['predict_end'] > task['train_end'] else None)
+        return task['horizon'], task['fold'], model if task['fold'] is None else None, predictions
+    finally:
+        for block in blocks:
+            block.close()
+
+
+class HorizonEnsemble:
+    """A base model per smoothing horizon plus a linear stacking layer, saved and used as one model.
+
+    feature_names_in_ lists every horizon's '_diff' columns, so model_backends.predict() scores a
+    whole slate in one call, and team_states() gives each team's current vector in that layout.
+    """
+
+    def __init__(self, horizons, stats, base_models, stacker, base_backend):
+        self.horizons = list(horizons)
+        self.stats = list(stats)
+        self.base_models = base_models
+        self.stacker = stacker
+        self.backend_ = 'ensemble'
+        self.base_backend_ = base_backend
+        self.feature_names_in_ = np.array([column for horizon in self.horizons for column in horizon_columns(horizon, self.stats)], dtype=object)
+        self.feature_schema_ = {'features': list(self.feature_names_in_), 'dtype': 'float32'}
+
+    def base_predictions(self, X):
+        """(games x horizons) matrix of every base model's prediction."""
+        values = np.asarray(X[list(self.feature_names_in_)] if isinstance(X, pd.DataFrame) else X, dtype=np.float32)
+        n_stats = len(self.stats)
+        return np.column_stack([model.predict(values[:, i * n_stats:(i + 1) * n_stats])
+                                for i, model in enumerate(self.base_models)])
+
+    def predict(self, X):
+        return self.stacker.predict(self.base_predictions(X))
+
+    def team_states(self, raw_df):
+        """Each team's current smoothed stats for every horizon, indexed by team (a game is home row - away row)."""
+        df, states = team_horizon_states(raw_df, self.horizons, self.stats, shift=False)
+        return states.groupby(df['TEAM_ABBREVIATION']).last()[list(self.feature_names_in_)]
+
+
+def fit_ensemble(X, y, horizons, stats=STATS_TO_AVERAGE, backend=ENSEMBLE_BACKEND, folds=ENSEMBLE_FOLDS,
+                 max_workers=ENSEMBLE_WORKERS):
+    """Fits every horizon's base models in a process pool and stacks them on time-ordered out-of-fold predictions.
+
+    X must be in chronological order with the horizons' columns in order. For each horizon there is one
+    task per expanding-window fold plus the final fit on all rows, so the pool gets horizons x (folds + 1)
+    independent tasks and wall time scales with the number of cores.
+    """
+    n_games, n_stats = len(X), len(stats)
+    bounds = np.linspace(0, n_games, folds + 2).astype(int)  # Block 0 only ever trains; blocks 1..folds get predicted
+    params = {'n_jobs': 1} if backend == 'forest' else {}
+
+    X_memory, X_spec = share_array(np.ascontiguousarray(X.to_numpy(dtype=np.float32)))
+    y_memory, y_spec = share_array(np.ascontiguousarray(y.to_numpy(dtype=np.float64)))
+    try:
+        tasks = []
+        for h in range(len(horizons)):
+            columns = (h * n_stats, (h + 1) * n_stats)
+            tasks.append({'horizon': h, 'fold': None, 'train_end': n_games, 'predict_end': n_games})
+            tasks.extend({'horizon': h, 'fold': k, 'train_end': int(bounds[k]), 'predict_end': int(bounds[k + 1])}
+                         for k in range(folds, 0, -1))
+            for task in tasks[-(folds + 1):]:
+                task.update({'X': X_spec, 'y': y_spec, 'columns': columns, 'backend': backend, 'params': params})
+        # Largest fits first across all horizons, so the pool does not finish on one long straggler
+        tasks.sort(key=lambda task: task['train_end'], reverse=True)
+
+        base_models = [None] * len(horizons)
+        oof = np.zeros((n_games - bounds[1], len(horizons)))
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+            for h, fold, model, predictions in pool.map(fit_horizon_task, tasks):
+                if fold is None:
+                    base_models[h] = model
+                else:
+                    oof[bounds[fold] - bounds[1]:bounds[fold + 1] - bounds[1], h] = predictions
+    finally:
+        for memory in (X_memory, y_memory):
+            memory.close()
+            memory.unlink()
+
+    # Non-negative weights keep the stack an interpretable blend of horizons
+    stacker = LinearRegression(positive=True).fit(oof, y.to_numpy()[bounds[1]:])
+    oof_mae = {horizon_name(horizon): mean_absolute_error(y.iloc[bounds[1]:], oof[:, h]) for h, horizon in enumerate(horizons)}
+    oof_mae['stacked'] = mean_absolute_error(y.iloc[bounds[1]:], stacker.predict(oof))
+    return HorizonEnsemble(horizons, stats, base_models, stacker, backend), oof_mae
+
+
+def train_league(league, test_size=TEST_SIZE):
+    """Builds the league's horizon features, fits the ensemble on the training games, evaluates and saves it."""
+    files = LEAGUES[league]
+    horizons = make_horizons()
+    print(f"\n{league}: building features for {len(horizons)} horizons "
+          f"({', '.join(horizon_name(horizon) for horizon in horizons)}) from '{files['raw']}'...")
+    features_df = build_horizon_features(pd.read_csv(files['raw']), horizons)
+    columns = [column for horizon in horizons for column in horizon_columns(horizon)]
+
+    split_index = int(len(features_df) * (1 - test_size))
+    X_train, X_test = features_df[columns].iloc[:split_index], features_df[columns].iloc[split_index:]
+    y_train, y_test = features_df['point_differential'].iloc[:split_index], features_df['point_differential'].iloc[split_index:]
+    print(f"{len(X_train)} games for training, {len(X_test)} games for testing, {len(columns)} features.")
+
+    start = time.perf_counter()
+    model, oof_mae = fit_ensemble(X_train, y_train, horizons)
+    print(f"Fitted {len(horizons) * (ENSEMBLE_FOLDS + 1)} base models on {ENSEMBLE_WORKERS or os.cpu_count()} "
+          f"worker(s) in {time.perf_counter() - start:.1f}s.")
+
+    # Test MAE of every horizon on its own and of the stacked ensemble
+    base = model.base_predictions(X_test)
+    report = pd.DataFrame({
+        'Horizon': [horizon_name(horizon) for horizon in horizons] + ['stacked'],
+        'Stack Weight': list(model.stacker.coef_) + [np.nan],
+        'Out-of-Fold MAE': [oof_mae[horizon_name(horizon)] for horizon in horizons] + [oof_mae['stacked']],
+        'Test MAE': [mean_absolute_error(y_test, base[:, h]) for h in range(len(horizons))]
+                    + [mean_absolute_error(y_test, model.stacker.predict(base))]
+    })
+    print(report.to_string(index=False, float_format='{:.3f}'.format))
+
+    save_model(model, files['model'])
+    print(f"Ensemble saved to '{files['model']}'.")
+    return model
+
+
+# --- Main Script ---
+if __name__ == "__main__":
+    # Train through the imported module, so saved ensembles unpickle as horizon_ensemble.HorizonEnsemble
+    # in forecast_today.py instead of as a class of this script's __main__
+    import horizon_ensemble
+
+    print("--- Multi-Horizon Ensemble Training ---")
+    for league in LEAGUES:
+        try:
+            horizon_ensemble.train_league(league)
+        except FileNotFoundError as e:
+            print(f"{league}: skipped, could not find required file: {e.filename}")
+        except Exception as e:
+            print(f"{league}: an unexpected error occurred: {e}")
@@ -0,0 +1,88 @@
+import pandas as pd
+import time
+from sklearn.metrics import mean_absolute_error
+from model_backends import make_model
+
+# Shared warm-start helpers for the nightly model refresh in train_final_model.py and train_model_wnba.py.
+# Every forest trained through here carries two extra attributes that survive joblib:
+#   tree_windows_    -> one {'start', 'end', 'games'} dict per tree, describing the data it was fitted on
+#   trained_through_ -> the date of the newest game any tree has seen
+
+
+def data_window(dates):
+    """Describes the slice of games a batch of trees is fitted on."""
+    return {'start': str(pd.Timestamp(dates.min()).date()), 'end': str(pd.Timestamp(dates.max()).date()), 'games': int(len(dates))}
+
+
+def fit_full_forest(X, y, dates, n_estimators=100):
+    """Trains a forest from scratch and records that every tree saw the full window."""
+    model = make_model('forest', n_estimators=n_estimators)
+    model.fit(X, y)
+    model.backend_ = 'forest'
+    model.tree_windows_ = [data_window(dates)] * n_estimators
+    model.trained_through_ = str(pd.Timestamp(dates.max()).date())
+    return model
+
+
+def add_recent_trees(model, X_recent, y_recent, dates_recent, n_new_trees, max_trees):
+    """Adds trees fitted on a recent window to a saved forest and evicts the oldest trees beyond max_trees."""
+    window = data_window(dates_recent)
+    # Trees from a forest saved before windows were tracked have no known window
+    windows = list(getattr(model, 'tree_windows_', [None] * len(model.estimators_)))
+
+    # A fresh seed per refresh keeps new trees' bootstraps independent of the trees they replace
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new_trees,
+                     random_state=int(window['end'].replace('-', '')))
+    model.fit(X_recent, y_recent)
+    windows.extend([window] * n_new_trees)
+
+    # warm_start appends new trees at the end, so the oldest ones are always at the front
+    excess = len(model.estimators_) - max_trees
+    if excess > 0:
+        model.estimators_ = model.estimators_[excess:]
+        windows = windows[excess:]
+
+    model.set_params(warm_start=False, n_estimators=len(model.estimators_))
+    model.tree_windows_ = windows
+    model.trained_through_ = max(getattr(model, 'trained_through_', None) or window['end'], window['end'])
+    return model
+
+
+def compare_incremental_to_full(X, y, dates, test_size=0.2, base_fraction=0.75, refresh_games=100,
+                                recent_window_games=400, n_new_trees=10, max_trees=200):
+    """Replays nightly refreshes over the training period and reports MAE and fit time against a full retrain."""
+    split_index = int(len(X) * (1 - test_size))
+    X_test, y_test = X.iloc[split_index:], y.iloc[split_index:]
+
+    # Full retrain on everything before the test period
+    start = time.perf_counter()
+    full_model = fit_full_forest(X.iloc[:split_index], y.iloc[:split_index], dates.iloc[:split_index])
+    full_seconds = time.perf_counter() - start
+    full_mae = mean_absolute_error(y_test, full_model.predict(X_test))
+
+    # Base forest on the older part, then refreshed in steps of refresh_games until the test period
+    base_index = int(split_index * base_fraction)
+    incremental_model = fit_full_forest(X.iloc[:base_index], y.iloc[:base_index], dates.iloc[:base_index])
+    refresh_seconds = []
+    for end in list(range(base_index + refresh_games, split_index, refresh_games)) + [split_index]:
+        # Like the nightly refresh, the window always reaches back to the previous refresh
+        window = slice(max(0, end - max(recent_window_games, refresh_games)), end)
+        start = time.perf_counter()
+        add_recent_trees(incremental_model, X.iloc[window], y.iloc[window], dates.iloc[window], n_new_trees, max_trees)
+        refresh_seconds.append(time.perf_counter() - start)
+    incremental_mae = mean_absolute_error(y_test, incremental_model.predict(X_test))
+
+    report = {
+        'full_mae': full_mae, 'incremental_mae': incremental_mae, 'mae_delta': incremental_mae - full_mae,
+        'full_fit_seconds': full_seconds, 'mean_refresh_seconds': sum(refresh_seconds) / len(refresh_seconds),
+        'refreshes': len(refresh_seconds), 'incremental_trees': len(incremental_model.estimators_)
+    }
+
+    print("\n--- Incremental Refresh vs. Full Retrain ---")
+    print(f"Test games: {len(X_test)} | Refreshes replayed: {report['refreshes']} (every {refresh_games} games, "
+          f"{n_new_trees} trees on the last {recent_window_games} games)")
+    print(f"Full retrain MAE:       {full_mae:.2f} (fit: {full_seconds:.2f}s)")
+    print(f"Incremental MAE:        {incremental_mae:.2f} (avg refresh: {report['mean_refresh_seconds']:.2f}s, "
+          f"{report['incremental_trees']} trees)")
+    print(f"Accuracy cost (MAE delta): {report['mae_delta']:+.2f} points")
+    return report
@@ -1,47 +1,94 @@
 import pandas as pd
-import joblib
+import time
+from model_attribution import explain_model
+from model_backends import load_model, model_backend
 
 # --- Configuration ---
 # Point this to our best, tuned WNBA model
 TUNED_MODEL_FILE = "wnba_model_tuned.joblib"
-# We need the data file to get the feature names in the correct order
+# Feature data for the held-out slice the attributions are measured on
 WNBA_EWMA_FEATURE_FILE = "wnba_games_ewma_features.csv"
+# Attributions are measured on games the model never saw: those after its trained_through_ date.
+# With fewer than MIN_UNSEEN_GAMES of them, a copy of the model with the same settings is refitted
+# on everything before the latest HOLDOUT_FRACTION of games and explained on that slice instead.
+MIN_UNSEEN_GAMES = 100
+HOLDOUT_FRACTION = 0.2 # The most recent games, by date
+PERMUTATION_REPEATS = 10
+SHAP_OUTPUT_FILE = "wnba_shap_contributions.csv" # Per-game contributions for the held-out slice
 
 # --- Main Script ---
 print(f"--- Inspecting Feature Importances for Model: {TUNED_MODEL_FILE} ---")
 
 try:
-    # 1. LOAD THE TUNED MODEL AND THE DATA
-    model = joblib.load(TUNED_MODEL_FILE)
-    df = pd.read_csv(WNBA_EWMA_FEATURE_FILE)
-
-    # 2. GET THE LIST OF FEATURES (must be identical to the training script)
-    features = [col for col in df.columns if col.endswith('_diff')]
-
-    # 3. EXTRACT THE IMPORTANCE SCORES
-    # The model stores these after being trained.
-    importances = model.feature_importances_
-
-    # 4. CREATE A DATAFRAME FOR EASY VIEWING
-    importance_df = pd.DataFrame({
-        'Feature': features,
-        'Importance': importances
-    })
-
-    # 5. SORT BY IMPORTANCE AND DISPLAY
-    importance_df = importance_df.sort_values(by='Importance', ascending=False)
-    
-    # Add a percentage column for easier interpretation
-    importance_df['Importance (%)'] = (importance_df['Importance'] * 100).map('{:.2f}%'.format)
-
-    print("\nFeature importance represents the 'weight' or 'value' the model assigns to each feature.")
-    print("A higher value means the model found that feature more predictive.\n")
-    
-    # Use to_string() to ensure all rows are printed
-    print(importance_df[['Feature', 'Importance (%)']].to_string(index=False))
+    # 1. LOAD THE TUNED MODEL
+    model = load_model(TUNED_MODEL_FILE)
+
+    # 2. GET THE LIST OF FEATURES (stored on the model itself, in training order)
+    features = list(model.feature_names_in_)
+
+    # 3. EXTRACT THE IMPURITY IMPORTANCE SCORES
+    # Only forests store these; permutation importance below works for every backend.
+    backend = model_backend(model)
+    if backend != 'forest':
+        print(f"\nThe '{backend}' model has no impurity importances or trees for TreeSHAP; showing permutation importance only.")
+    else:
+        # The model stores these after being trained.
+        importance_df = pd.DataFrame({
+            'Feature': features,
+            'Importance': model.feature_importances_
+        }).sort_values(by='Importance', ascending=False)
+
+        # Add a percentage column for easier interpretation
+        importance_df['Importance (%)'] = (importance_df['Importance'] * 100).map('{:.2f}%'.format)
+
+        print("\nFeature importance represents the 'weight' or 'value' the model assigns to each feature.")
+        print("A higher value means the model found that feature more predictive.\n")
+
+        # Use to_string() to ensure all rows are printed
+        print(importance_df[['Feature', 'Importance (%)']].to_string(index=False))
+
+    # 4. LOAD THE HELD-OUT TIME SLICE (only the columns we need)
+    df = pd.read_csv(WNBA_EWMA_FEATURE_FILE, usecols=['GAME_ID_home', 'GAME_DATE_home', 'TEAM_ABBREVIATION_home',
+                                                     'TEAM_ABBREVIATION_away', 'point_differential'] + features)
+    df['GAME_DATE_home'] = pd.to_datetime(df['GAME_DATE_home'])
+    df = df.sort_values('GAME_DATE_home')
+    trained_through = getattr(model, 'trained_through_', None)
+    unseen_df = df[df['GAME_DATE_home'] > pd.Timestamp(trained_through)] if trained_through else df.iloc[:0]
+    if len(unseen_df) >= MIN_UNSEEN_GAMES:
+        holdout_df, fit_on = unseen_df, None
+        print(f"\nThe model was trained through {trained_through}; explaining the {len(holdout_df)} games played since.")
+    else:
+        # The saved model was fitted on (almost) every game, so its own training games cannot be the holdout
+        split_index = int(len(df) * (1 - HOLDOUT_FRACTION))
+        holdout_df = df.iloc[split_index:]
+        fit_on = (df[features].iloc[:split_index], df['point_differential'].iloc[:split_index])
+        print(f"\nOnly {len(unseen_df)} games since the model was trained (through {trained_through or 'an unknown date'}): "
+              f"refitting its settings on the {split_index} earlier games to explain the latest {len(holdout_df)}.")
+
+    # 5. PERMUTATION IMPORTANCE AND PER-GAME TREESHAP (cached per model checksum)
+    print(f"Explaining {len(holdout_df)} held-out games from {holdout_df['GAME_DATE_home'].min().date()} on...")
+    start = time.perf_counter()
+    results = explain_model(TUNED_MODEL_FILE, holdout_df[features], holdout_df['point_differential'],
+                            n_repeats=PERMUTATION_REPEATS, fit_on=fit_on)
+    print(f"Attributions ready in {time.perf_counter() - start:.2f}s.")
+
+    print("\nPermutation importance: how much the held-out MAE gets worse when a feature is shuffled.\n")
+    print(results['permutation'].to_string(index=False, float_format='{:.3f}'.format))
+
+    shap_df = results['shap']
+    if shap_df is not None:
+        mean_abs_shap = shap_df.abs().mean().sort_values(ascending=False)
+        print(f"\nMean |SHAP| contribution in points (baseline prediction: {results['expected_value']:.2f}):\n")
+        print(mean_abs_shap.map('{:.3f}'.format).to_string())
+
+        # 6. SAVE THE PER-GAME CONTRIBUTIONS
+        contributions_df = pd.concat([holdout_df[['GAME_ID_home', 'GAME_DATE_home', 'TEAM_ABBREVIATION_home', 'TEAM_ABBREVIATION_away']],
+                                      shap_df.add_suffix('_shap')], axis=1)
+        contributions_df.to_csv(SHAP_OUTPUT_FILE, index=False)
+        print(f"\nPer-game contributions saved to '{SHAP_OUTPUT_FILE}'.")
 
 except FileNotFoundError as e:
     print(f"\nERROR: Could not find a required file: {e.filename}")
     print("Please make sure you have run the training and tuning scripts first.")
 except Exception as e:
-    print(f"\nAn unexpected error occurred: {e}")
\ No newline at end of file
+    print(f"\nAn unexpected error occurred: {e}")
@@ -0,0 +1,120 @@
+import json
+import os
+import time
+
+# --- Configuration ---
+# One table per league: every ordered home/away pair scored once, right after the nightly data refresh
+LEAGUES = {
+    'NBA': {'model': "nba_model_tuned.joblib", 'raw': "nba_games_raw.csv", 'table': "nba_matchup_table.json"},
+    'WNBA': {'model': "wnba_model_tuned.joblib", 'raw': "wnba_games_raw.csv", 'table': "wnba_matchup_table.json"}
+}
+ALPHA = 0.1  # Must match the EWMA used for training and by forecast_today.py
+
+
+# --- Helper Functions ---
+def file_signature(path):
+    """(mtime, size) of a file: enough to notice it was rewritten since the table was built."""
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def latest_team_states(model, raw_df, alpha=ALPHA):
+    """Each team's current vector in the model's feature layout, indexed by team: a game's features are home row - away row.
+
+    Plain models use the '<STAT>_diff' EWMAs; models that smooth their own way (the horizon
+    ensemble) say so through a team_states() method.
+    """
+    if hasattr(model, 'team_states'):
+        return model.team_states(raw_df)
+    model_stats = [feature[:-len('_diff')] for feature in model.feature_names_in_]
+    df = raw_df.sort_values(['TEAM_ABBREVIATION', 'GAME_DATE'], kind='mergesort')
+    # The training EWMA, but only each team's latest state, for every team in one grouped pass
+    latest = (df.groupby('TEAM_ABBREVIATION')[model_stats]
+              .ewm(alpha=alpha, adjust=False).mean()
+              .groupby(level=0).last())
+    latest.columns = list(model.feature_names_in_)
+    return latest
+
+
+def build_matchup_table(model_file, raw_file, table_file, alpha=ALPHA):
+    """Scores every ordered home/away pair of current teams in one batched predict and writes the lookup table."""
+    # Heavy imports live here so forecasts that only read the table never pay for them
+    import numpy as np
+    import pandas as pd
+    from model_backends import load_model, predict
+
+    model = load_model(model_file)
+
+    df = pd.read_csv(raw_file)
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
+
+    # 1. EVERY TEAM'S CURRENT FEATURE VECTOR IN ONE GROUPED PASS
+    latest = latest_team_states(model, df, alpha)
+
+    # Only teams that played in the latest season (drops relocated/renamed franchises)
+    if 'SEASON_ID' in df.columns:
+        teams = sorted(df.loc[df['SEASON_ID'] == df['SEASON_ID'].max(), 'TEAM_ABBREVIATION'].unique())
+    else:
+        teams = sorted(latest.index)
+    vectors = latest.loc[teams].to_numpy()
+
+    # 2. ALL ORDERED PAIRS AS ONE MATRIX, 3. SCORED IN ONE BATCHED PREDICT
+    home_index, away_index = np.nonzero(~np.eye(len(teams), dtype=bool))
+    pairs = pd.DataFrame(vectors[home_index] - vectors[away_index], columns=list(model.feature_names_in_))
+    predicted = predict(model, pairs)
+
+    predictions = {team: {} for team in teams}
+    for home, away, margin in zip(home_index, away_index, predicted):
+        predictions[teams[home]][teams[away]] = round(float(margin), 3)
+
+    latest_ids = df.sort_values('GAME_DATE').drop_duplicates('TEAM_ID', keep='last')
+    table = {
+        'data_through': str(df['GAME_DATE'].max().date()),
+        'built_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'raw_signature': file_signature(raw_file),
+        'model_signature': file_signature(model_file),
+        'team_ids': {str(team_id): abbr for team_id, abbr in zip(latest_ids['TEAM_ID'], latest_ids['TEAM_ABBREVIATION'])},
+        'predictions': predictions
+    }
+
+    # 4. WRITE THE TINY LOOKUP TABLE (atomically, so a reader never sees half a file)
+    temp_file = f"{table_file}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(table, f)
+    os.replace(temp_file, table_file)
+    return table
+
+
+def load_matchup_table(table_file, raw_file, model_file):
+    """Returns the table, or None if it is missing or older than the data or model it was built from."""
+    if not os.path.exists(table_file):
+        return None
+    with open(table_file) as f:
+        table = json.load(f)
+
+    for label, path, signature in (('data', raw_file, table['raw_signature']), ('model', model_file, table['model_signature'])):
+        if os.path.exists(path) and file_signature(path) != signature:
+            print(f"Matchup table '{table_file}' is stale: the {label} file '{path}' changed since it was built.")
+            return None
+    return table
+
+
+def predicted_margin(table, home_team, away_team):
+    """O(1) lookup of the model's predicted home margin, or None for an unknown pairing."""
+    return table['predictions'].get(home_team, {}).get(away_team)
+
+
+# --- Main Script ---
+if __name__ == "__main__":
+    print("--- Building All-Pairs Matchup Tables ---")
+    for league, files in LEAGUES.items():
+        try:
+            start = time.perf_counter()
+            table = build_matchup_table(files['model'], files['raw'], files['table'])
+            n_pairs = sum(len(aways) for aways in table['predictions'].values())
+            print(f"{league}: scored {n_pairs} matchups of {len(table['predictions'])} teams "
+                  f"(data through {table['data_through']}) in {time.perf_counter() - start:.2f}s -> '{files['table']}'")
+        except FileNotFoundError as e:
+            print(f"{league}: skipped, could not find required file: {e.filename}")
+        except Exception as e:
+            print(f"{league}: an unexpected error occurred: {e}")
@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+import joblib
+import hashlib
+import os
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from model_backends import model_backend
+
+# --- Configuration ---
+ATTRIBUTION_CACHE_DIR = "attribution_cache"  # Results are stored per model checksum + data slice
+
+
+# --- Caching Helpers ---
+def model_checksum(model_file):
+    """SHA-256 of the saved model file, so a retrained model never reuses stale attributions."""
+    digest = hashlib.sha256()
+    with open(model_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def data_checksum(X, y=None):
+    """Cheap content hash of the rows being explained."""
+    frame = X if y is None else X.assign(__target__=np.asarray(y))
+    return hashlib.sha256(pd.util.hash_pandas_object(frame, index=False).values.tobytes()).hexdigest()[:16]
+
+
+# --- Permutation Importance ---
+def permutation_importance(model, X, y, n_repeats=10, random_state=42, n_jobs=-1):
+    """MAE increase when each feature is shuffled. Every feature's repeats are scored in one batched predict call."""
+    X_values = X.to_numpy(dtype=np.float64)
+    y_values = np.asarray(y, dtype=np.float64)
+    n_rows = len(X_values)
+    baseline_mae = np.abs(model.predict(X) - y_values).mean()
+
+    def score_feature(column):
+        rng = np.random.default_rng(random_state + column)
+        batch = np.tile(X_values, (n_repeats, 1))
+        for repeat in range(n_repeats):
+            batch[repeat * n_rows:(repeat + 1) * n_rows, column] = rng.permutation(X_values[:, column])
+        predictions = model.predict(pd.DataFrame(batch, columns=X.columns)).reshape(n_repeats, n_rows)
+        return np.abs(predictions - y_values).mean(axis=1) - baseline_mae
+
+    # Threads: the model is shared rather than pickled to each worker, and predict releases the GIL
+    scores = np.array(Parallel(n_jobs=n_jobs, prefer='threads')(
+        delayed(score_feature)(column) for column in range(X_values.shape[1])))
+
+    return pd.DataFrame({
+        'Feature': X.columns,
+        'MAE Increase': scores.mean(axis=1),
+        'MAE Increase Std': scores.std(axis=1)
+    }).sort_values('MAE Increase', ascending=False).reset_index(drop=True)
+
+
+# --- Exact TreeSHAP ---
+def tree_paths(tree):
+    """Flattens a fitted sklearn tree into one row per leaf.
+
+    Repeated splits on the same feature along a root-to-leaf path are merged into a single
+    (lower, upper] interval with the product of their cover ratios, which is all path-dependent
+    TreeSHAP needs. Rows are padded to the longest path with neutral entries (cover 1, open interval).
+    """
+    children_left, children_right = tree.children_left, tree.children_right
+    cover = tree.weighted_n_node_samples
+    leaves = []
+    stack = [(0, {})]
+    while stack:
+        node, path = stack.pop()
+        if children_left[node] == -1:
+            leaves.append((node, path))
+            continue
+        feature, threshold = tree.feature[node], tree.threshold[node]
+        for child, is_left in ((children_left[node], True), (children_right[node], False)):
+            lower, upper, ratio = path.get(feature, (-np.inf, np.inf, 1.0))
+            # sklearn sends x <= threshold to the left child
+            bounds = (lower, min(upper, threshold)) if is_left else (max(lower, threshold), upper)
+            stack.append((child, {**path, feature: (*bounds, ratio * cover[child] / cover[node])}))
+
+    depth = max(1, max(len(path) for _, path in leaves))
+    features = np.zeros((len(leaves), depth), dtype=np.intp)
+    lower = np.full((len(leaves), depth), -np.inf)
+    upper = np.full((len(leaves), depth), np.inf)
+    ratios = np.ones((len(leaves), depth))
+    for row, (_, path) in enumerate(leaves):
+        for position, (feature, (low, high, ratio)) in enumerate(path.items()):
+            features[row, position], lower[row, position], upper[row, position], ratios[row, position] = feature, low, high, ratio
+    values = np.array([tree.value[node].ravel()[0] for node, _ in leaves])
+    return features, lower, upper, ratios, values
+
+
+def tree_shap(tree, X_values, n_features, chunk_size=256):
+    """Exact path-dependent TreeSHAP values of one tree for every row of X_values.
+
+    For a leaf with value v and merged path features j (cover ratio z_j, indicator o_j that the
+    row falls inside feature j's interval), feature i receives
+        v * (o_i - z_i) * integral_0^1 prod_{j != i} (z_j + (o_j - z_j) t) dt,
+    the Beta-integral form of the Shapley weights. The integrand is a polynomial of degree
+    depth - 1, so Gauss-Legendre quadrature with ceil(depth / 2) nodes is exact. Because o_j is
+    0 or 1, every factor takes one of two precomputed values, and the products and quadrature sums
+    become batched matrix products over all leaves at once.
+    """
+    features, lower, upper, ratios, values = tree_paths(tree)
+    n_leaves, depth = features.shape
+    nodes, weights = np.polynomial.legendre.leggauss(max(1, (depth + 1) // 2))
+    nodes, weights = (nodes + 1) / 2, weights / 2  # Map [-1, 1] onto [0, 1]
+
+    # Factor values per (leaf, position, node) for rows inside (o=1) and outside (o=0) the interval
+    factor_in = ratios[:, :, None] + (1 - ratios[:, :, None]) * nodes
+    factor_out = ratios[:, :, None] * (1 - nodes)
+    log_out_total = np.log(factor_out).sum(axis=1)[:, None, :]  # (leaves, 1, nodes)
+    log_delta = np.log(factor_in) - np.log(factor_out)  # (leaves, depth, nodes)
+    # Quadrature weights / factor_i, pre-scaled by the (o_i - z_i) slope and the leaf value: (leaves, nodes, depth)
+    weighted_in = (weights / factor_in * ((1 - ratios) * values[:, None])[:, :, None]).transpose(0, 2, 1)
+    weighted_out = (weights / factor_out * (-ratios * values[:, None])[:, :, None]).transpose(0, 2, 1)
+
+    # Scatters (leaf, position) contributions onto feature columns with one matrix product
+    scatter = np.zeros((n_leaves * depth, n_features))
+    scatter[np.arange(n_leaves * depth), features.ravel()] = 1.0
+
+    shap_values = np.empty((len(X_values), n_features))
+    for start in range(0, len(X_values), chunk_size):
+        x_path = X_values[start:start + chunk_size][:, features].transpose(1, 0, 2)  # (leaves, rows, depth)
+        inside = (x_path > lower[:, None, :]) & (x_path <= upper[:, None, :])
+        # prod_j factor_j evaluated at every quadrature node: (leaves, rows, nodes)
+        path_product = np.exp(log_out_total + inside.astype(np.float64) @ log_delta)
+        # sum_q w_q * prod_j factor_j / factor_i, picking the in/out factor for position i
+        contributions = np.where(inside, path_product @ weighted_in, path_product @ weighted_out)
+        shap_values[start:start + chunk_size] = contributions.transpose(1, 0, 2).reshape(inside.shape[1], -1) @ scatter
+    return shap_values
+
+
+def forest_shap_values(model, X, n_jobs=-1):
+    """Exact TreeSHAP contributions for every row of X, averaged over the forest.
+
+    Returns (shap_values, expected_value); each row's contributions plus expected_value add up to
+    the model's prediction for that row.
+    """
+    X_values = X.to_numpy(dtype=np.float32).astype(np.float64)  # Trees split on float32 inputs
+    n_features = X_values.shape[1]
+    per_tree = Parallel(n_jobs=n_jobs, prefer='threads')(
+        delayed(tree_shap)(estimator.tree_, X_values, n_features) for estimator in model.estimators_)
+    expected_value = float(np.mean([estimator.tree_.value[0].ravel()[0] for estimator in model.estimators_]))
+    return np.mean(per_tree, axis=0), expected_value
+
+
+# --- Cached Entry Point ---
+def explain_model(model_file, X, y, n_repeats=10, fit_on=None):
+    """Permutation importance and per-game TreeSHAP for a saved model, cached per model checksum and data slice.
+
+    TreeSHAP walks a forest's estimators_, so for other backends 'shap' and 'expected_value' are None.
+
+    With fit_on=(X_fit, y_fit), a copy of the saved model (same hyperparameters) is refitted on
+    those games first, so X can be a slice the saved model itself was trained on.
+    """
+    refit_key = f"_refit{data_checksum(*fit_on)}" if fit_on is not None else ""
+    cache_file = os.path.join(ATTRIBUTION_CACHE_DIR, f"{model_checksum(model_file)}{refit_key}_{data_checksum(X, y)}_{n_repeats}.joblib")
+    if os.path.exists(cache_file):
+        return joblib.load(cache_file)
+
+    model = joblib.load(model_file)
+    if fit_on is not None:
+        X_fit, y_fit = fit_on
+        dtype = getattr(model, 'feature_schema_', {}).get('dtype', 'float64')
+        model = clone(model).fit(X_fit.astype(dtype), y_fit)
+    results = {'permutation': permutation_importance(model, X, y, n_repeats=n_repeats), 'shap': None, 'expected_value': None}
+    if model_backend(model) == 'forest':
+        shap_values, results['expected_value'] = forest_shap_values(model, X)
+        results['shap'] = pd.DataFrame(shap_values, columns=X.columns, index=X.index)
+
+    os.makedirs(ATTRIBUTION_CACHE_DIR, exist_ok=True)
+    joblib.dump(results, cache_file)
+    return results
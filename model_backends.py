@@ -0,0 +1,57 @@
+import joblib
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+
+# Every training, tuning and backtest script builds its model through here, and forecast_today.py
+# loads and predicts through the same functions, so switching MODEL_BACKEND in a script is enough
+# to swap engines.
+#   'forest'  -> the original full-depth RandomForestRegressor
+#   'hist_gb' -> HistGradientBoostingRegressor: features binned to uint8 histograms, float32
+#                gradients, and early stopping on a held-out fraction, so it only grows as many
+#                boosting rounds as the data supports
+BACKENDS = {
+    'forest': lambda: RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1),
+    'hist_gb': lambda: HistGradientBoostingRegressor(max_iter=500, learning_rate=0.05, max_bins=255,
+                                                     early_stopping=True, validation_fraction=0.1,
+                                                     n_iter_no_change=20, random_state=42),
+}
+
+
+def make_model(backend='forest', **params):
+    """Builds an unfitted estimator for the named backend with the repo's default settings."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend '{backend}'. Choose one of: {', '.join(BACKENDS)}")
+    model = BACKENDS[backend]()
+    return model.set_params(**params) if params else model
+
+
+def attach_schema(model, features, dtype='float32'):
+    """Stores the input schema on the model so forecasting computes only what it needs."""
+    model.feature_schema_ = {'features': list(features), 'dtype': dtype}
+    return model
+
+
+def fit_model(backend, X, y, dtype='float32', **params):
+    """Fits a backend on X cast to dtype and tags the model with its backend and input schema."""
+    model = make_model(backend, **params)
+    model.fit(X.astype(dtype), y)
+    model.backend_ = backend
+    return attach_schema(model, X.columns, dtype)
+
+
+def model_backend(model):
+    """Name of the backend a saved model came from (models saved before backends existed are forests)."""
+    return getattr(model, 'backend_', 'forest' if isinstance(model, RandomForestRegressor) else type(model).__name__)
+
+
+def save_model(model, path):
+    joblib.dump(model, path)
+
+
+def load_model(path):
+    return joblib.load(path)
+
+
+def predict(model, X):
+    """Predicts with the column order and dtype the model was trained on."""
+    dtype = getattr(model, 'feature_schema_', {}).get('dtype', 'float64')
+    return model.predict(X[list(model.feature_names_in_)].astype(dtype))
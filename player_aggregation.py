@@ -0,0 +1,167 @@
+import pandas as pd
+import numpy as np
+from nba_api.stats.endpoints import leaguegamelog
+import os
+import time
+
+# --- Configuration ---
+# The last season in the list is the live one: it is topped up every night, the others are read from cache.
+SEASONS_TO_FETCH = ['2021-22', '2022-23', '2023-24']
+PLAYER_LOG_DIR = "player_logs"  # One compact parquet file of raw player game logs per season
+OUTPUT_FILE = "nba_games_with_players.csv"  # Consumed by feature_engineering_v2.py
+ALPHA = 0.1  # Same smoothing factor as the team EWMA features
+TOP_N_PLAYERS = 3  # How many of a team's best players count towards "availability"
+CAPACITY_WINDOW = 10  # Team games over which a full-strength top-N impact is measured
+REQUEST_DELAY_SECONDS = 1.0
+MAX_RETRIES = 3
+
+# Raw columns kept from the API; everything after MATCHUP is a numeric box-score stat
+PLAYER_LOG_COLUMNS = ['PLAYER_ID', 'TEAM_ABBREVIATION', 'GAME_ID', 'GAME_DATE', 'MATCHUP',
+                      'MIN', 'FGM', 'FGA', 'FTM', 'FTA', 'OREB', 'DREB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS']
+PLAYER_FEATURES = ['player_impact_ewma', 'player_top_impact', 'player_top_availability', 'player_rotation_minutes']
+
+
+# --- Helper Functions ---
+def fetch_player_logs(season, date_from=None):
+    """Fetches every player-game row of a season in one request (optionally only from date_from on)."""
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            gamelogs = leaguegamelog.LeagueGameLog(season=season, player_or_team_abbreviation='P',
+                                                   season_type_all_star='Regular Season',
+                                                   date_from_nullable=date_from.strftime('%m/%d/%Y') if date_from is not None else '')
+            df_players = gamelogs.get_data_frames()[0]
+            # Be polite to the API
+            time.sleep(REQUEST_DELAY_SECONDS)
+            return df_players
+        except Exception as e:
+            if attempt == MAX_RETRIES:
+                raise
+            print(f"Request for {season} failed ({e}). Retrying...")
+            time.sleep(REQUEST_DELAY_SECONDS * 2 ** attempt)
+
+
+def compact_player_logs(df):
+    """Keeps only the columns we aggregate and downcasts them so a season takes a few MB on disk."""
+    df = df[PLAYER_LOG_COLUMNS].copy()
+    # Integer game IDs match how the team logs come back from read_csv (leading zeros dropped)
+    df['GAME_ID'] = df['GAME_ID'].astype('int32')
+    df['PLAYER_ID'] = df['PLAYER_ID'].astype('int32')
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
+    df['IS_HOME'] = ~df['MATCHUP'].str.contains('@')
+    df['TEAM_ABBREVIATION'] = df['TEAM_ABBREVIATION'].astype(str).astype('category')
+    stat_columns = PLAYER_LOG_COLUMNS[PLAYER_LOG_COLUMNS.index('MIN'):]
+    df[stat_columns] = df[stat_columns].astype('float32')
+    return df.drop(columns=['MATCHUP'])
+
+
+def load_season(season, refresh):
+    """Returns a season's player logs from cache, topping the cache up from the API when refresh is set."""
+    cache_file = os.path.join(PLAYER_LOG_DIR, f"nba_player_logs_{season}.parquet")
+    cached = pd.read_parquet(cache_file) if os.path.exists(cache_file) else None
+    if cached is not None and not refresh:
+        print(f"Loaded {len(cached)} cached player-game rows for {season}.")
+        return cached
+
+    # Re-request the last cached date as well so late stat corrections for it are picked up
+    date_from = cached['GAME_DATE'].max() if cached is not None else None
+    print(f"Fetching {season} player logs" + (f" from {date_from.date()}..." if date_from is not None else "..."))
+    new_rows = fetch_player_logs(season, date_from)
+    if new_rows.empty:
+        print(f"No new player-game rows for {season}.")
+        return cached
+
+    new_rows = compact_player_logs(new_rows)
+    combined = new_rows if cached is None else pd.concat([cached, new_rows], ignore_index=True)
+    combined = combined.drop_duplicates(subset=['PLAYER_ID', 'GAME_ID'], keep='last')
+    combined['TEAM_ABBREVIATION'] = combined['TEAM_ABBREVIATION'].astype(str).astype('category')
+
+    os.makedirs(PLAYER_LOG_DIR, exist_ok=True)
+    combined.to_parquet(cache_file, index=False)
+    print(f"Cached {len(combined)} player-game rows for {season} ({len(combined) - (0 if cached is None else len(cached))} new).")
+    return combined
+
+
+def build_player_features(logs):
+    """Aggregates player logs into one row per game with home/away team player-strength features."""
+    logs = logs.sort_values(['PLAYER_ID', 'GAME_DATE'], kind='mergesort').reset_index(drop=True)
+
+    # Hollinger Game Score as a single per-game measure of a player's impact
+    logs['IMPACT'] = (logs['PTS'] + 0.4 * logs['FGM'] - 0.7 * logs['FGA'] - 0.4 * (logs['FTA'] - logs['FTM'])
+                      + 0.7 * logs['OREB'] + 0.3 * logs['DREB'] + logs['STL'] + 0.7 * logs['AST']
+                      + 0.7 * logs['BLK'] - 0.4 * logs['PF'] - logs['TOV'])
+
+    # Per-player EWMAs in one grouped pass. Use .shift(1) to prevent data leakage from the current game.
+    for stat in ['IMPACT', 'MIN']:
+        prior = logs.groupby('PLAYER_ID', sort=False)[stat].shift(1)
+        logs[f'{stat}_ewma'] = (prior.groupby(logs['PLAYER_ID'], sort=False)
+                                .ewm(alpha=ALPHA, adjust=False).mean()
+                                .reset_index(level=0, drop=True)
+                                .fillna(0))  # A player's debut carries no weight yet
+    logs['WEIGHTED_IMPACT'] = logs['IMPACT_ewma'] * logs['MIN_ewma']
+
+    # Collapse to one row per team per game, using only the players who actually suited up
+    team_keys = ['GAME_ID', 'TEAM_ABBREVIATION']
+    team_games = logs.groupby(team_keys, observed=True).agg(
+        GAME_DATE=('GAME_DATE', 'first'), IS_HOME=('IS_HOME', 'first'), PTS=('PTS', 'sum'),
+        weighted_impact=('WEIGHTED_IMPACT', 'sum'), player_rotation_minutes=('MIN_ewma', 'sum'))
+    team_games['player_impact_ewma'] = team_games['weighted_impact'] / team_games['player_rotation_minutes'].replace(0, np.nan)
+
+    top_players = logs.sort_values('IMPACT_ewma', ascending=False).groupby(team_keys, observed=True).head(TOP_N_PLAYERS)
+    team_games['player_top_impact'] = top_players.groupby(team_keys, observed=True)['IMPACT_ewma'].sum()
+
+    # Availability: today's top-N impact relative to the team's best top-N over its recent games
+    team_games = team_games.reset_index().sort_values(['TEAM_ABBREVIATION', 'GAME_DATE'], kind='mergesort')
+    capacity = (team_games.groupby('TEAM_ABBREVIATION', observed=True, sort=False)['player_top_impact']
+                .rolling(CAPACITY_WINDOW, min_periods=1).max()
+                .reset_index(level=0, drop=True))
+    team_games['player_top_availability'] = team_games['player_top_impact'] / capacity.where(capacity > 0)
+
+    # Create the final one-row-per-game dataset
+    team_columns = ['GAME_ID', 'GAME_DATE', 'TEAM_ABBREVIATION', 'PTS'] + PLAYER_FEATURES
+    home = team_games.loc[team_games['IS_HOME'], team_columns].add_suffix('_home')
+    away = team_games.loc[~team_games['IS_HOME'], team_columns].add_suffix('_away')
+    games = pd.merge(home, away, left_on='GAME_ID_home', right_on='GAME_ID_away')
+
+    for feature in PLAYER_FEATURES:
+        games[f'{feature}_advantage'] = games[f'{feature}_home'] - games[f'{feature}_away']
+    games['point_differential'] = games['PTS_home'] - games['PTS_away']
+
+    columns_to_keep = ['GAME_ID_home', 'GAME_DATE_home', 'TEAM_ABBREVIATION_home', 'TEAM_ABBREVIATION_away']
+    for feature in PLAYER_FEATURES:
+        columns_to_keep.extend([f'{feature}_home', f'{feature}_away', f'{feature}_advantage'])
+    columns_to_keep.append('point_differential')
+
+    # Drop games where a side has no player history yet (the very first games in the cache)
+    return games[columns_to_keep].dropna().sort_values('GAME_DATE_home')
+
+
+# --- Main Script ---
+if __name__ == "__main__":
+    print(f"--- Player-Level Aggregation for seasons: {SEASONS_TO_FETCH} ---")
+    try:
+        # 1. LOAD (AND TOP UP) THE PER-SEASON PLAYER LOG CACHE
+        season_logs = []
+        for season in SEASONS_TO_FETCH:
+            season_df = load_season(season, refresh=(season == SEASONS_TO_FETCH[-1]))
+            if season_df is not None:
+                season_logs.append(season_df)
+
+        if not season_logs:
+            raise ValueError("No player logs were fetched. Please check your connection and the season list.")
+
+        all_logs = pd.concat(season_logs, ignore_index=True)
+        all_logs['TEAM_ABBREVIATION'] = all_logs['TEAM_ABBREVIATION'].astype(str).astype('category')
+
+        # 2. AGGREGATE TO TEAM-GAME PLAYER FEATURES
+        print(f"Aggregating {len(all_logs)} player-game rows...")
+        start = time.perf_counter()
+        player_games_df = build_player_features(all_logs)
+        print(f"Aggregation finished in {time.perf_counter() - start:.2f}s.")
+
+        # 3. SAVE THE PLAYER FEATURE FILE
+        player_games_df.to_csv(OUTPUT_FILE, index=False)
+        print(f"\nSUCCESS! Player features for {len(player_games_df)} games saved to '{OUTPUT_FILE}'")
+        print(player_games_df[['GAME_ID_home', 'player_impact_ewma_advantage', 'player_top_availability_advantage', 'point_differential']].head())
+
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
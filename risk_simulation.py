@@ -0,0 +1,197 @@
+import pandas as pd
+import numpy as np
+import time
+from scipy.stats import norm
+from model_backends import fit_model
+
+# --- Configuration ---
+EWMA_FEATURE_FILE = "nba_games_ewma_features.csv" # Or "wnba_games_ewma_features.csv"
+# Sign convention: vegas_spread is the market's expected home margin, in the same units as
+# model_prediction and point_differential (+11.5 = home favored by 11.5), so edge = prediction - vegas_spread.
+# Real lines for the simulated season: columns date, TEAM_ABBREVIATION_home, spread_line, where spread_line
+# is the home team's betting quote (-11.5 when home is favored, like the backtests' odds) and is negated on
+# load. Without it a naive line fitted on PTS_diff stands in for the market.
+SPREADS_FILE = None
+CALIBRATION_FRACTION = 0.2  # Latest slice of the training seasons used to scale the forest's spread to real errors
+
+# Paths assume each game's outcome follows the forest's own predictive distribution: they show how much
+# luck alone spreads the season's results, not whether the model is biased (the backtests answer that).
+N_PATHS = 20000
+STARTING_BANKROLL = 100.0   # In units: a 1-unit bet risks 1% of the starting bankroll
+WIN_PAYOUT = 100 / 110      # Profit per unit staked on a win at standard -110 (the backtests count even money, 1.0)
+RUIN_LEVEL = 0.2            # A path is ruined once its bankroll falls to 20% of the start
+SIZING = "both"             # 'tiers', 'kelly' or 'both'
+KELLY_FRACTION = 0.25       # Fractional Kelly: full Kelly on estimated probabilities is far too aggressive
+MAX_KELLY_STAKE = 0.05      # Never stake more than 5% of the current bankroll on one game
+RANDOM_STATE = 42
+
+# --- Betting Strategy Configuration ---
+BETTING_THRESHOLDS = {
+    "High_Confidence": {'edge': 8.0, 'units': 3},
+    "Medium_Confidence": {'edge': 5.0, 'units': 2},
+    "Low_Confidence": {'edge': 3.0, 'units': 1}
+}
+
+
+# --- Helper Functions ---
+def season_of(game_ids):
+    """Season year from NBA/WNBA game IDs (e.g. 0022300007 -> 23)."""
+    return (game_ids.astype(np.int64) // 100000) % 100
+
+
+def tree_predictions(model, X):
+    """Every tree's prediction for every game as one (n_trees, n_games) array.
+
+    One apply() call finds each game's leaf in every tree, and one fancy-indexing pass reads the
+    leaf values out of a padded (n_trees, max_nodes) table, instead of calling predict per tree.
+    """
+    dtype = getattr(model, 'feature_schema_', {}).get('dtype', 'float32')
+    leaves = model.apply(X[list(model.feature_names_in_)].astype(dtype))  # (n_games, n_trees)
+    leaf_values = np.zeros((len(model.estimators_), max(tree.tree_.node_count for tree in model.estimators_)))
+    for t, tree in enumerate(model.estimators_):
+        leaf_values[t, :tree.tree_.node_count] = tree.tree_.value[:, 0, 0]
+    return leaf_values[np.arange(len(model.estimators_))[:, None], leaves.T]
+
+
+def spread_scale(model, X_calibration, y_calibration):
+    """Factor that widens the trees' disagreement into the size of real prediction errors."""
+    per_tree = tree_predictions(model, X_calibration)
+    residual_std = np.std(y_calibration.to_numpy() - per_tree.mean(axis=0))
+    return residual_std / per_tree.std(axis=0).mean()
+
+
+def tier_units(edge):
+    tiers = sorted(BETTING_THRESHOLDS.values(), key=lambda config: config['edge'], reverse=True)
+    return np.select([np.abs(edge) > config['edge'] for config in tiers], [config['units'] for config in tiers], default=0)
+
+
+def kelly_fractions(win_probability, payout=WIN_PAYOUT, fraction=KELLY_FRACTION, cap=MAX_KELLY_STAKE):
+    """Fractional Kelly stake as a share of the current bankroll, 0 where there is no expected edge."""
+    full_kelly = (win_probability * (payout + 1) - 1) / payout
+    return np.clip(full_kelly * fraction, 0, cap)
+
+
+def simulate_wins(per_tree, scale, spreads, edge, n_paths, rng):
+    """(paths x bets) matrix of won bets: each outcome is a random tree's prediction, widened around the forest mean."""
+    n_trees, n_bets = per_tree.shape
+    mean = per_tree.mean(axis=0)
+    picked = per_tree[rng.integers(n_trees, size=(n_paths, n_bets)), np.arange(n_bets)]
+    outcomes = mean + scale * (picked - mean)
+    return (np.sign(edge) * (outcomes - spreads)) > 0
+
+
+def bankroll_paths(wins, stakes=None, fractions=None, start=STARTING_BANKROLL, payout=WIN_PAYOUT):
+    """Bankroll after each bet on every path, plus the amount staked per path.
+
+    Fixed stakes (in units) add up; Kelly fractions of the current bankroll compound.
+    """
+    returns = np.where(wins, payout, -1.0)
+    if stakes is not None:
+        bankroll = start + np.cumsum(returns * stakes, axis=1)
+        staked = np.full(len(wins), stakes.sum())
+    else:
+        bankroll = start * np.cumprod(1 + returns * fractions, axis=1)
+        before = np.hstack([np.full((len(wins), 1), start), bankroll[:, :-1]])
+        staked = (before * fractions).sum(axis=1)
+    return bankroll, staked
+
+
+def risk_report(bankroll, staked, start=STARTING_BANKROLL, ruin_level=RUIN_LEVEL):
+    """Drawdown, ruin probability and ROI/final-bankroll quantiles over all simulated paths."""
+    peaks = np.maximum.accumulate(np.hstack([np.full((len(bankroll), 1), start), bankroll]), axis=1)[:, 1:]
+    max_drawdown = (1 - bankroll / peaks).max(axis=1)
+    final = bankroll[:, -1]
+    roi = np.divide(final - start, staked, out=np.zeros_like(final), where=staked > 0)
+    quantiles = [0.05, 0.25, 0.5, 0.75, 0.95]
+    report = pd.DataFrame({
+        'ROI': np.quantile(roi, quantiles),
+        'Final Bankroll': np.quantile(final, quantiles),
+        'Max Drawdown': np.quantile(max_drawdown, quantiles)
+    }, index=[f'{int(q * 100)}%' for q in quantiles])
+    return report, float((bankroll.min(axis=1) <= start * ruin_level).mean()), float((final > start).mean())
+
+
+# --- Main Script ---
+if __name__ == "__main__":
+    print("--- Bankroll Risk Simulation ---")
+    print(f"Loading feature data from '{EWMA_FEATURE_FILE}'...")
+    try:
+        df = pd.read_csv(EWMA_FEATURE_FILE)
+        df['GAME_DATE_home'] = pd.to_datetime(df['GAME_DATE_home'])
+        df = df.sort_values('GAME_DATE_home').reset_index(drop=True)
+        features = [col for col in df.columns if col.endswith('_diff')]
+
+        # 1. SIMULATE THE LATEST SEASON WITH A FOREST TRAINED ON EVERYTHING BEFORE IT
+        season = season_of(df['GAME_ID_home'])
+        train_df, test_df = df[season < season.iloc[-1]], df[season == season.iloc[-1]].copy()
+        if train_df.empty:
+            raise ValueError("Need at least one earlier season to train on before the simulated season.")
+        print(f"{len(train_df)} games for training, simulating {len(test_df)} games of the latest season.")
+
+        start = time.perf_counter()
+        calibration_start = int(len(train_df) * (1 - CALIBRATION_FRACTION))
+        calibration_model = fit_model('forest', train_df[features].iloc[:calibration_start], train_df['point_differential'].iloc[:calibration_start])
+        scale = spread_scale(calibration_model, train_df[features].iloc[calibration_start:], train_df['point_differential'].iloc[calibration_start:])
+        model = fit_model('forest', train_df[features], train_df['point_differential'])
+        print(f"Trained in {time.perf_counter() - start:.1f}s. Tree spread widened by {scale:.2f}x to match calibration errors.")
+
+        # 2. EACH GAME'S PREDICTIVE DISTRIBUTION FROM ALL TREES AT ONCE
+        start = time.perf_counter()
+        per_tree = tree_predictions(model, test_df[features])
+        test_df['model_prediction'] = per_tree.mean(axis=0)
+        test_df['prediction_std'] = scale * per_tree.std(axis=0)
+        print(f"{per_tree.shape[0]} trees x {per_tree.shape[1]} games predicted in {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+        # 3. LINES: REAL SPREADS IF GIVEN, OTHERWISE A NAIVE PTS_diff LINE
+        if SPREADS_FILE:
+            spreads_df = pd.read_csv(SPREADS_FILE)
+            spreads_df['date'] = pd.to_datetime(spreads_df['date'])
+            # Betting quote (home -11.5) -> expected home margin (+11.5)
+            spreads_df['vegas_spread'] = -spreads_df['spread_line']
+            test_df['column'] = np.arange(len(test_df))  # Keeps each game's column in per_tree through the merge
+            test_df = pd.merge(test_df, spreads_df[['date', 'TEAM_ABBREVIATION_home', 'vegas_spread']],
+                               left_on=['GAME_DATE_home', 'TEAM_ABBREVIATION_home'],
+                               right_on=['date', 'TEAM_ABBREVIATION_home'])
+            per_tree = per_tree[:, test_df['column'].to_numpy()]
+            print(f"Found lines for {len(test_df)} games in '{SPREADS_FILE}'.")
+        else:
+            # Already an expected home margin, so no conversion
+            slope, intercept = np.polyfit(train_df['PTS_diff'], train_df['point_differential'], 1)
+            test_df['vegas_spread'] = (intercept + slope * test_df['PTS_diff']).round() + 0.5
+            print(f"No SPREADS_FILE: using a naive line, {intercept:.2f} + {slope:.2f} x PTS_diff, as the market.")
+
+        test_df['edge'] = test_df['model_prediction'] - test_df['vegas_spread']
+        test_df['bet_units'] = tier_units(test_df['edge'])
+        test_df['win_probability'] = norm.cdf(np.abs(test_df['edge']) / test_df['prediction_std'])
+        bets = (test_df['bet_units'] > 0).to_numpy()
+        if not bets.any():
+            raise ValueError("No game clears the lowest BETTING_THRESHOLDS edge.")
+        bets_df = test_df[bets]
+        print(f"{bets.sum()} bets in the season ({bets_df['bet_units'].sum()} units at fixed tiers).")
+
+        # 4. SIMULATE EVERY PATH AT ONCE: ONE (paths x bets) MATRIX OF OUTCOMES
+        start = time.perf_counter()
+        rng = np.random.default_rng(RANDOM_STATE)
+        wins = simulate_wins(per_tree[:, bets], scale, bets_df['vegas_spread'].to_numpy(), bets_df['edge'].to_numpy(), N_PATHS, rng)
+
+        strategies = {}
+        if SIZING in ('tiers', 'both'):
+            strategies['Fixed Tiers'] = bankroll_paths(wins, stakes=bets_df['bet_units'].to_numpy(dtype=float))
+        if SIZING in ('kelly', 'both'):
+            strategies[f'{KELLY_FRACTION:g} Kelly'] = bankroll_paths(wins, fractions=kelly_fractions(bets_df['win_probability'].to_numpy()))
+        print(f"Simulated {N_PATHS} paths x {wins.shape[1]} bets in {time.perf_counter() - start:.2f}s "
+              f"(mean simulated win rate {wins.mean():.2%}).")
+
+        # 5. REPORT
+        for name, (bankroll, staked) in strategies.items():
+            report, ruin_probability, profit_probability = risk_report(bankroll, staked)
+            print(f"\n--- {name} (start {STARTING_BANKROLL:g} units) ---")
+            print(report.to_string(formatters={'ROI': '{:.2%}'.format, 'Final Bankroll': '{:.1f}'.format,
+                                               'Max Drawdown': '{:.2%}'.format}))
+            print(f"Probability of profit: {profit_probability:.2%}")
+            print(f"Probability of ruin (bankroll <= {RUIN_LEVEL:.0%} of start): {ruin_probability:.2%}")
+
+    except FileNotFoundError as e:
+        print(f"ERROR: Could not find required file: {e.filename}")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
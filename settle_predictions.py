@@ -0,0 +1,190 @@
+import pandas as pd
+import numpy as np
+from nba_api.stats.endpoints import leaguegamelog
+import json
+import os
+import time
+
+# --- Configuration ---
+PREDICTION_LOG_FILE = 'prediction_log.csv'  # Pending forecasts written by forecast_today.py
+SETTLED_LOG_FILE = 'settled_predictions.csv'  # Append-only ledger of graded forecasts
+SUMMARY_FILE = 'settlement_summary.json'  # Running ROI / win-rate totals per league
+ROLLING_DAYS = 30  # How many settled days the rolling ROI and win rate look back over
+LEAGUE_IDS = {'NBA': '00', 'WNBA': '10'}
+SEASON_TYPES = ['Regular Season', 'Playoffs']
+
+# --- Betting Strategy Configuration (must match the backtests) ---
+BETTING_THRESHOLDS = {
+    "High_Confidence": {'edge': 8.0, 'units': 3},
+    "Medium_Confidence": {'edge': 5.0, 'units': 2},
+    "Low_Confidence": {'edge': 3.0, 'units': 1}
+}
+
+SETTLED_COLUMNS = ['Date', 'League', 'Home Team', 'Away Team', 'Model Prediction', 'Vegas Spread',
+                   'Edge', 'Recommendation', 'Actual Result', 'Bet Units', 'Bet Won', 'Profit Units']
+GAME_KEY = ['Date', 'League', 'Home Team', 'Away Team']  # One forecast per game: a re-run replaces the earlier row
+
+
+# --- Helper Functions ---
+def season_for_date(league, game_date):
+    """Maps a game date to the season string LeagueGameLog expects ('2023-24' for NBA, '2024' for WNBA)."""
+    if league == 'WNBA':
+        return str(game_date.year)
+    start_year = game_date.year if game_date.month >= 8 else game_date.year - 1
+    return f"{start_year}-{str(start_year + 1)[-2:]}"
+
+
+def fetch_final_scores(league, game_dates):
+    """Fetches the finished games on the given dates, one row per game with home and away paired up."""
+    date_from = min(game_dates).strftime('%m/%d/%Y')
+    date_to = max(game_dates).strftime('%m/%d/%Y')
+    seasons = sorted({season_for_date(league, d) for d in game_dates})
+
+    # Only the window spanned by the pending forecasts is requested, never the full season
+    logs = []
+    for season in seasons:
+        for season_type in SEASON_TYPES:
+            gamelogs = leaguegamelog.LeagueGameLog(season=season, league_id=LEAGUE_IDS[league],
+                                                   season_type_all_star=season_type,
+                                                   date_from_nullable=date_from, date_to_nullable=date_to)
+            logs.append(gamelogs.get_data_frames()[0])
+            # Be polite to the API
+            time.sleep(1)
+
+    logs_df = pd.concat(logs, ignore_index=True)
+    logs_df['GAME_DATE'] = pd.to_datetime(logs_df['GAME_DATE']).dt.strftime('%Y-%m-%d')
+
+    is_away = logs_df['MATCHUP'].str.contains('@')
+    home = logs_df.loc[~is_away, ['GAME_ID', 'GAME_DATE', 'TEAM_ABBREVIATION', 'PTS', 'PLUS_MINUS']].add_suffix('_home')
+    away = logs_df.loc[is_away, ['GAME_ID', 'TEAM_ABBREVIATION', 'PTS']].add_suffix('_away')
+    games = pd.merge(home, away, left_on='GAME_ID_home', right_on='GAME_ID_away')
+
+    return games.rename(columns={'GAME_DATE_home': 'Date', 'TEAM_ABBREVIATION_home': 'Home Team',
+                                 'TEAM_ABBREVIATION_away': 'Away Team', 'PLUS_MINUS_home': 'point_differential'})
+
+
+def grade_predictions(matched_df):
+    """Applies the backtest edge/threshold rules to forecasts that now have a final score."""
+    graded = matched_df.copy()
+    # The unrounded values forecast_today.py logs; rows logged before those columns existed
+    # fall back to the one-decimal display strings
+    edge = graded.get('Edge Points', pd.Series(np.nan, index=graded.index)).astype(float)
+    edge = edge.fillna(graded['Edge'].astype(float))
+    vegas_spread = graded.get('Spread Line', pd.Series(np.nan, index=graded.index)).astype(float)
+    vegas_spread = vegas_spread.fillna(graded['Vegas Spread'].str.rsplit(' by ', n=1).str[1].astype(float))
+
+    # Highest tier first, exactly like the backtests' sorted threshold loop
+    tiers = sorted(BETTING_THRESHOLDS.values(), key=lambda config: config['edge'], reverse=True)
+    graded['Bet Units'] = np.select([edge.abs() > config['edge'] for config in tiers],
+                                    [config['units'] for config in tiers], default=0)
+    graded['Bet Won'] = (edge * (graded['point_differential'] - vegas_spread)) > 0
+    graded['Profit Units'] = np.where(graded['Bet Won'], graded['Bet Units'], -graded['Bet Units'])
+    graded['Actual Result'] = graded['Home Team'] + ' by ' + graded['point_differential'].map('{:.0f}'.format)
+    return graded[SETTLED_COLUMNS]
+
+
+def update_summary(summary, graded):
+    """Folds newly settled bets into the running per-league totals without touching older settlements."""
+    bets = graded[graded['Bet Units'] > 0]
+    for (league, game_date), day in bets.groupby(['League', 'Date']):
+        day_totals = {
+            'bets': int(len(day)),
+            'wins': int(day['Bet Won'].sum()),
+            'units_risked': float(day['Bet Units'].sum()),
+            'profit': float(day['Profit Units'].sum())
+        }
+
+        totals = summary.setdefault(league, {'bets': 0, 'wins': 0, 'units_risked': 0.0, 'profit': 0.0, 'recent_days': []})
+        for key, value in day_totals.items():
+            totals[key] += value
+
+        # Late games for an already-settled date are merged into that date's entry
+        recent = {day_entry['date']: day_entry for day_entry in totals['recent_days']}
+        if game_date in recent:
+            for key, value in day_totals.items():
+                recent[game_date][key] += value
+        else:
+            recent[game_date] = {'date': game_date, **day_totals}
+        totals['recent_days'] = sorted(recent.values(), key=lambda day_entry: day_entry['date'])[-ROLLING_DAYS:]
+    return summary
+
+
+def print_summary(summary):
+    """Prints all-time and rolling win rate / ROI for each league."""
+    for league, totals in summary.items():
+        recent_bets = sum(day['bets'] for day in totals['recent_days'])
+        recent_wins = sum(day['wins'] for day in totals['recent_days'])
+        recent_risked = sum(day['units_risked'] for day in totals['recent_days'])
+        recent_profit = sum(day['profit'] for day in totals['recent_days'])
+
+        print(f"\n--- {league} Live Performance ---")
+        print(f"All-Time: {totals['bets']} bets | Win Rate: {totals['wins'] / totals['bets'] if totals['bets'] else 0:.2%} | "
+              f"Profit: {totals['profit']:.2f} units | ROI: {totals['profit'] / totals['units_risked'] if totals['units_risked'] else 0:.2%}")
+        print(f"Last {len(totals['recent_days'])} betting days: {recent_bets} bets | Win Rate: {recent_wins / recent_bets if recent_bets else 0:.2%} | "
+              f"Profit: {recent_profit:.2f} units | ROI: {recent_profit / recent_risked if recent_risked else 0:.2%}")
+
+
+# --- Main Script ---
+if __name__ == "__main__":
+    print("--- Settling Pending Predictions ---")
+
+    try:
+        # 1. LOAD THE PENDING QUEUE
+        # forecast_today.py appends to the log and settled rows are moved out of it,
+        # so this file only ever holds the forecasts that still await a result.
+        log_df = pd.read_csv(PREDICTION_LOG_FILE)
+        pending_df = log_df[log_df['Actual Result'] == 'Pending']
+        print(f"Found {len(pending_df)} pending predictions in '{PREDICTION_LOG_FILE}'.")
+
+        # A game forecast twice (the script re-run, or ball forecast after forecast_today.py) is graded
+        # once, from its latest row; the earlier rows leave the queue with it
+        duplicates = pending_df.duplicated(subset=GAME_KEY, keep='last')
+        if duplicates.any():
+            print(f"Ignoring {duplicates.sum()} duplicate forecasts; only the latest row per game is graded.")
+        pending_df = pending_df[~duplicates]
+
+        settled_frames = []
+        for league, league_pending in pending_df.groupby('League'):
+            # 2. FETCH FINAL SCORES ONLY FOR THE DATES WE ARE WAITING ON
+            game_dates = list(pd.to_datetime(league_pending['Date'].unique()))
+            print(f"Fetching final {league} scores from {min(game_dates).date()} to {max(game_dates).date()}...")
+            games = fetch_final_scores(league, game_dates)
+
+            # 3. JOIN PREDICTIONS TO RESULTS BY DATE AND TEAM PAIR
+            matched = pd.merge(league_pending.drop(columns=['Actual Result']),
+                               games[['Date', 'Home Team', 'Away Team', 'point_differential']],
+                               on=['Date', 'Home Team', 'Away Team'], how='inner')
+            print(f"Matched {len(matched)} of {len(league_pending)} pending {league} predictions to final scores.")
+
+            if not matched.empty:
+                settled_frames.append(grade_predictions(matched))
+
+        if settled_frames:
+            graded_df = pd.concat(settled_frames, ignore_index=True)
+
+            # 4. APPEND TO THE SETTLED LEDGER AND SHRINK THE PENDING QUEUE
+            graded_df.to_csv(SETTLED_LOG_FILE, mode='a', header=not os.path.exists(SETTLED_LOG_FILE), index=False)
+            settled_keys = set(graded_df[GAME_KEY].itertuples(index=False, name=None))
+            is_settled = (log_df['Actual Result'] == 'Pending') & pd.Series(
+                [key in settled_keys for key in log_df[GAME_KEY].itertuples(index=False, name=None)], index=log_df.index)
+            log_df[~is_settled].to_csv(PREDICTION_LOG_FILE, index=False)
+            print(f"\nSettled {len(graded_df)} predictions into '{SETTLED_LOG_FILE}'.")
+            print(graded_df[['Date', 'Home Team', 'Away Team', 'Edge', 'Actual Result', 'Bet Units', 'Profit Units']].to_string(index=False))
+
+            # 5. UPDATE THE RUNNING AGGREGATES
+            summary = {}
+            if os.path.exists(SUMMARY_FILE):
+                with open(SUMMARY_FILE) as f:
+                    summary = json.load(f)
+            summary = update_summary(summary, graded_df)
+            with open(SUMMARY_FILE, 'w') as f:
+                json.dump(summary, f, indent=2)
+            print_summary(summary)
+        else:
+            print("\nNo pending predictions could be settled yet.")
+
+    except FileNotFoundError as e:
+        print(f"ERROR: Could not find required file: {e.filename}")
+        print("Please run 'forecast_today.py' first.")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
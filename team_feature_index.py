@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import time
+
+# --- Configuration ---
+# Point-in-time store of every team's EWMA state after every game, for leak-free "as of date D" lookups
+LEAGUES = {
+    'NBA': {'raw': "nba_games_raw.csv", 'index': "nba_team_index.npz"},
+    'WNBA': {'raw': "wnba_games_raw.csv", 'index': "wnba_team_index.npz"}
+}
+ALPHA = 0.1  # Must match feature_engineering_final.py
+STATS_TO_AVERAGE = ['FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+                    'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB',
+                    'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS']
+KEY_STRIDE = 10 ** 6  # Composite key = team code * KEY_STRIDE + day number; day numbers stay far below this
+
+
+# --- Helper Functions ---
+def to_days(dates):
+    """Dates (strings, Timestamps or datetime64) as int64 days since 1970-01-01."""
+    return pd.to_datetime(pd.Series(dates)).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def build_index(raw_df, alpha=ALPHA, stats=STATS_TO_AVERAGE):
+    """Sorted, contiguous arrays of each team's EWMA state after each of its games.
+
+    Rows are ordered by team, then date, so one team's history is a contiguous slice and the
+    composite (team, day) key is globally sorted, which is what makes every lookup a binary search.
+    """
+    df = raw_df[['TEAM_ABBREVIATION', 'GAME_DATE'] + stats].copy()
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'])
+    df = df.sort_values(['TEAM_ABBREVIATION', 'GAME_DATE'], kind='mergesort').reset_index(drop=True)
+
+    # Same EWMA as matchup_table.latest_team_states, but keeping the state after every game instead of only the last
+    states = (df.groupby('TEAM_ABBREVIATION', sort=False)[stats]
+              .ewm(alpha=alpha, adjust=False).mean()
+              .reset_index(level=0, drop=True)
+              .sort_index())
+
+    teams, team_codes = np.unique(df['TEAM_ABBREVIATION'].to_numpy(), return_inverse=True)
+    days = to_days(df['GAME_DATE'])
+    return {
+        'teams': teams.astype(str),
+        'stats': np.array(stats),
+        'keys': team_codes.astype(np.int64) * KEY_STRIDE + days,
+        'team_start': np.searchsorted(team_codes, np.arange(len(teams))).astype(np.int64),
+        'values': np.ascontiguousarray(states[stats].to_numpy(dtype=np.float64)),
+        'alpha': np.array(alpha)
+    }
+
+
+def save_index(index, path):
+    np.savez(path, **index)
+
+
+def load_index(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def as_of_bulk(index, teams, dates):
+    """EWMA states of many (team, date) pairs at once: each team's state after its last game strictly before the date.
+
+    Unknown teams, or dates before a team's first game, come back as rows of NaN.
+    """
+    team_lookup = {team: code for code, team in enumerate(index['teams'])}
+    codes = np.array([team_lookup.get(team, -1) for team in teams], dtype=np.int64)
+    query_keys = codes * KEY_STRIDE + to_days(dates)
+
+    # Last stored row with a key strictly below the query: same team, earlier day
+    rows = np.searchsorted(index['keys'], query_keys, side='left') - 1
+    valid = (codes >= 0) & (rows >= np.where(codes >= 0, index['team_start'][codes.clip(0)], 0))
+
+    states = np.full((len(codes), index['values'].shape[1]), np.nan)
+    states[valid] = index['values'][rows[valid]]
+    return states
+
+
+def as_of(index, team, date):
+    """EWMA state of one team as of a date, as a Series named by stat (all NaN without prior games)."""
+    return pd.Series(as_of_bulk(index, [team], [date])[0], index=[f'{stat}_ewma' for stat in index['stats']])
+
+
+def matchup_features(index, home_teams, away_teams, dates, stats=None):
+    """Leak-free '<STAT>_diff' rows for (home, away, date) games, in the layout the models are trained on."""
+    stats = list(index['stats']) if stats is None else list(stats)
+    columns = [list(index['stats']).index(stat) for stat in stats]
+    diffs = as_of_bulk(index, home_teams, dates)[:, columns] - as_of_bulk(index, away_teams, dates)[:, columns]
+    return pd.DataFrame(diffs, columns=[f'{stat}_diff' for stat in stats])
+
+
+# --- Main Script ---
+if __name__ == "__main__":
+    print("--- Building Point-in-Time Team Feature Indexes ---")
+    for league, files in LEAGUES.items():
+        try:
+            start = time.perf_counter()
+            index = build_index(pd.read_csv(files['raw']))
+            save_index(index, files['index'])
+            print(f"\n{league}: indexed {len(index['keys'])} team-games for {len(index['teams'])} teams "
+                  f"in {time.perf_counter() - start:.2f}s -> '{files['index']}'")
+
+            # Quick self-check of bulk lookup speed on random (team, date) pairs
+            rng = np.random.default_rng(42)
+            n_queries = 10000
+            query_teams = rng.choice(index['teams'], n_queries)
+            day_range = index['keys'] % KEY_STRIDE
+            query_dates = (rng.integers(day_range.min(), day_range.max() + 1, n_queries)).astype('datetime64[D]')
+            start = time.perf_counter()
+            as_of_bulk(index, query_teams, query_dates)
+            print(f"{league}: {n_queries} as-of lookups in {(time.perf_counter() - start) * 1000:.1f} ms")
+        except FileNotFoundError as e:
+            print(f"{league}: skipped, could not find required file: {e.filename}")
+        except Exception as e:
+            print(f"{league}: an unexpected error occurred: {e}")
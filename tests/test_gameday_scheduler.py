@@ -0,0 +1,153 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import gameday_scheduler
+
+GAME_ID = '0022600001'
+
+
+def scoreboard(status_id):
+    """Minimal ScoreboardV2 payload: one NYK at BOS game, scheduled (1) or in progress (2)."""
+    return {'resultSets': [
+        {'name': 'GameHeader',
+         'headers': ['GAME_ID', 'GAME_STATUS_ID', 'GAME_STATUS_TEXT', 'HOME_TEAM_ID', 'VISITOR_TEAM_ID'],
+         'rowSet': [[GAME_ID, status_id, '7:30 pm ET' if status_id == 1 else 'Q1 5:12', 1610612738, 1610612752]]},
+        {'name': 'LineScore', 'headers': ['TEAM_ID', 'TEAM_ABBREVIATION'],
+         'rowSet': [[1610612738, 'BOS'], [1610612752, 'NYK']]}
+    ]}
+
+
+class FakeScoreboard(BaseHTTPRequestHandler):
+    """Serves server.payload with an ETag per server.version, and 304 to a matching If-None-Match."""
+
+    def do_GET(self):
+        etag = f'"{self.server.version}"'
+        self.server.if_none_match.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        body = json.dumps(self.server.payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GamedaySchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.previous_dir = os.getcwd()
+        self.work_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.work_dir.name)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeScoreboard)
+        self.server.payload, self.server.version, self.server.if_none_match = scoreboard(1), 1, []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        # Module settings are read at call time, so the scheduler talks to the fake
+        self.saved = {name: getattr(gameday_scheduler, name)
+                      for name in ('SCOREBOARD_URL', 'SCOREBOARD_TTL_SECONDS', 'precompute_games')}
+        gameday_scheduler.SCOREBOARD_URL = f"http://127.0.0.1:{self.server.server_address[1]}/stats/scoreboardv2"
+        gameday_scheduler.SCOREBOARD_TTL_SECONDS = 3600
+        # Predictions come from self.margin instead of a trained model
+        self.margin = 4.5
+        gameday_scheduler.precompute_games = self.fake_precompute
+
+        self.state = {
+            'cache': {}, 'sources': {},
+            'team_index': {}, 'team_index_file': gameday_scheduler.TEAM_INDEX_FILE,
+            'gameday': {}, 'gameday_file': gameday_scheduler.GAMEDAY_FILE
+        }
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(gameday_scheduler, name, value)
+        self.server.shutdown()
+        self.server.server_close()
+        os.chdir(self.previous_dir)
+        self.work_dir.cleanup()
+
+    def fake_precompute(self, league, game_date, games, team_ids, sources):
+        return {str(game['GAME_ID']): {
+            'home': team_ids.get(str(game['HOME_TEAM_ID'])), 'away': team_ids.get(str(game['VISITOR_TEAM_ID'])),
+            'home_team_id': game['HOME_TEAM_ID'], 'away_team_id': game['VISITOR_TEAM_ID'],
+            'status': game['GAME_STATUS_TEXT'], 'predicted_diff': self.margin, 'features': None,
+            'prediction_source': 'test'
+        } for game in games}
+
+    def run_cycle(self):
+        asyncio.run(gameday_scheduler.run_cycle(self.state, leagues={'NBA': '00'}, lookahead_days=0))
+
+    def stored_game(self):
+        with open(gameday_scheduler.GAMEDAY_FILE) as f:
+            days = json.load(f)['NBA']
+        return next(iter(days.values()))['games'][GAME_ID]
+
+    def test_ttl_cache_then_etag_revalidation(self):
+        self.run_cycle()
+        self.assertEqual(self.server.if_none_match, [None])
+
+        # Within the TTL the cached scoreboard answers without a request
+        self.run_cycle()
+        self.assertEqual(len(self.server.if_none_match), 1)
+
+        # After the TTL the request revalidates with the ETag, and the 304 reuses the cached payload
+        gameday_scheduler.SCOREBOARD_TTL_SECONDS = 0
+        self.run_cycle()
+        self.assertEqual(self.server.if_none_match, [None, '"1"'])
+        cached = next(iter(self.state['cache'].values()))
+        self.assertEqual(cached['payload'], scoreboard(1))
+        self.assertEqual(self.stored_game()['predicted_diff'], 4.5)
+        self.assertEqual(self.state['team_index']['NBA'], {'1610612738': 'BOS', '1610612752': 'NYK'})
+
+    def test_tipped_off_games_keep_their_prediction(self):
+        gameday_scheduler.SCOREBOARD_TTL_SECONDS = 0
+        self.run_cycle()
+        self.assertEqual(self.stored_game()['predicted_diff'], 4.5)
+
+        # Before tip-off a changed prediction replaces the stored one
+        self.margin = 5.5
+        self.server.payload, self.server.version = scoreboard(1), 2
+        self.run_cycle()
+        self.assertEqual(self.stored_game()['predicted_diff'], 5.5)
+
+        # Once the game is under way only its status moves
+        self.margin = 9.0
+        self.server.payload, self.server.version = scoreboard(2), 3
+        self.run_cycle()
+        game = self.stored_game()
+        self.assertEqual(game['predicted_diff'], 5.5)
+        self.assertEqual(game['status'], 'Q1 5:12')
+
+    def test_forecast_reads_gameday_file_without_nba_api(self):
+        self.run_cycle()
+        script = ("import json, sys\n"
+                  "from forecast_today import predict_games\n"
+                  "games = predict_games('NBA')\n"
+                  "print(json.dumps({'games': games, 'nba_api': 'nba_api' in sys.modules}))\n")
+        env = dict(os.environ, PYTHONPATH=REPO_DIR)
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, env=env, check=True)
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        self.assertEqual(result['games'], [['BOS', 'NYK', 4.5]])
+        self.assertFalse(result['nba_api'])
+
+
+if __name__ == "__main__":
+    unittest.main()
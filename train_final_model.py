@@ -1,12 +1,32 @@
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error
-import joblib
+import os
+from model_backends import make_model, fit_model, attach_schema, model_backend, save_model, load_model, predict
+from incremental_forest import fit_full_forest, add_recent_trees, compare_incremental_to_full
+from feature_selection import select_features
 
 # --- Configuration ---
 EWMA_FEATURE_FILE = "nba_games_ewma_features.csv"
 MODEL_OUTPUT_FILE = "nba_model_final.joblib" # Our final, champion model
 TEST_SIZE = 0.2
+MODEL_BACKEND = "forest" # 'forest' or 'hist_gb' (see model_backends.py)
+
+# --- Incremental Refresh Configuration ---
+# Nightly refresh: instead of refitting from scratch, add trees fitted on the most recent games
+# to the saved forest and evict the oldest ones, so refresh time scales with the window, not the history.
+INCREMENTAL_MODE = False
+RECENT_WINDOW_GAMES = 400 # Games each batch of new trees is fitted on
+NEW_TREES_PER_REFRESH = 10
+MAX_TREES = 200 # Oldest trees are evicted beyond this
+COMPARE_WITH_FULL_RETRAIN = False # Replay nightly refreshes and report the MAE cost versus a full retrain
+REFRESH_EVERY_GAMES = 100 # Refresh cadence used by the comparison report
+
+# --- Feature Pruning Configuration ---
+# Keep one feature per cluster of highly correlated '_diff' columns (e.g. FGM/FGA/FG_PCT), as long as
+# the validation MAE stays within budget, and train on float32 inputs.
+FEATURE_PRUNING = False
+CORRELATION_THRESHOLD = 0.8 # Features more correlated than this are clustered together
+MAE_BUDGET = 0.05 # Max validation MAE increase (in points) the reduced feature set may cost
 
 # --- Main Script ---
 print("--- Training Final Model on EWMA Features ---")
@@ -29,32 +49,84 @@ try:
     print(f"\nFeatures being used for the model ({len(features)} total):")
     print(features)
     
-    # 2. SPLIT DATA INTO TRAINING AND TESTING SETS
-    split_index = int(len(df) * (1 - TEST_SIZE))
-    
-    X_train, X_test = X.iloc[:split_index], X.iloc[split_index:]
-    y_train, y_test = y.iloc[:split_index], y.iloc[split_index:]
-
-    print(f"\nSplitting data: {len(X_train)} games for training, {len(X_test)} games for testing.")
-
-    # 3. INITIALIZE AND TRAIN THE MODEL
-    print("Training the final RandomForestRegressor model...")
-    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-    model.fit(X_train, y_train)
-    print("Model training complete.")
-
-    # 4. EVALUATE THE MODEL'S PERFORMANCE
-    predictions = model.predict(X_test)
-    mae = mean_absolute_error(y_test, predictions)
-    print("\n--- Final Model Evaluation ---")
-    print(f"Mean Absolute Error (MAE) on the test set: {mae:.2f}")
-    print(f"This means, on average, our model's prediction is off by about {mae:.2f} points.")
-    print("\nBenchmark to beat (our previous best V1 Model): 12.27")
-
-    # 5. SAVE THE TRAINED FINAL MODEL
-    print(f"\nSaving the final trained model to '{MODEL_OUTPUT_FILE}'...")
-    joblib.dump(model, MODEL_OUTPUT_FILE)
-    print("Model saved successfully.")
+    if INCREMENTAL_MODE and os.path.exists(MODEL_OUTPUT_FILE):
+        # 2. LOAD THE SAVED FOREST AND FIND THE GAMES IT HAS NOT SEEN
+        model = load_model(MODEL_OUTPUT_FILE)
+        if model_backend(model) != 'forest':
+            raise ValueError(f"Incremental refresh needs a 'forest' model, but '{MODEL_OUTPUT_FILE}' is '{model_backend(model)}'.")
+        # Refresh on the same inputs the saved model was trained on (it may use a pruned float32 schema)
+        features = list(model.feature_names_in_)
+        X = df[features].astype(getattr(model, 'feature_schema_', {}).get('dtype', 'float64'))
+        trained_through = getattr(model, 'trained_through_', None)
+        new_games = df[df['GAME_DATE_home'] > pd.Timestamp(trained_through)] if trained_through else df
+        print(f"\nIncremental refresh: {len(new_games)} games played since the saved model was trained (through {trained_through}).")
+
+        if new_games.empty:
+            print("The saved model is already up to date. Nothing to refresh.")
+        else:
+            # 3. SCORE THE UNSEEN GAMES BEFORE THE MODEL LEARNS FROM THEM
+            mae = mean_absolute_error(new_games[target], predict(model, X.loc[new_games.index]))
+            print(f"MAE of the saved model on the {len(new_games)} new games: {mae:.2f}")
+
+            # 4. ADD TREES FITTED ON THE RECENT WINDOW
+            # Widened to every unseen game after a long gap, so none is skipped when trained_through_ moves past it
+            recent = df.iloc[-max(RECENT_WINDOW_GAMES, len(new_games)):]
+            print(f"Adding {NEW_TREES_PER_REFRESH} trees fitted on the last {len(recent)} games...")
+            model = add_recent_trees(model, X.loc[recent.index], recent[target], recent['GAME_DATE_home'],
+                                     NEW_TREES_PER_REFRESH, MAX_TREES)
+            windows = [w for w in model.tree_windows_ if w is not None]
+            print(f"Forest now has {len(model.estimators_)} trees covering data from "
+                  f"{min(w['start'] for w in windows) if windows else 'unknown'} to {model.trained_through_}.")
+
+            # 5. SAVE THE REFRESHED MODEL
+            save_model(model, MODEL_OUTPUT_FILE)
+            print(f"Refreshed model saved to '{MODEL_OUTPUT_FILE}'.")
+    else:
+        # 2. SPLIT DATA INTO TRAINING AND TESTING SETS
+        split_index = int(len(df) * (1 - TEST_SIZE))
+        
+        X_train, X_test = X.iloc[:split_index], X.iloc[split_index:]
+        y_train, y_test = y.iloc[:split_index], y.iloc[split_index:]
+
+        print(f"\nSplitting data: {len(X_train)} games for training, {len(X_test)} games for testing.")
+
+        if FEATURE_PRUNING:
+            # Selection only looks at the training games; the test set stays untouched
+            features, _ = select_features(X_train, y_train, model_factory=lambda: make_model(MODEL_BACKEND),
+                                          correlation_threshold=CORRELATION_THRESHOLD, mae_budget=MAE_BUDGET)
+            X = X[features].astype('float32')
+            X_train, X_test = X.iloc[:split_index], X.iloc[split_index:]
+            print(f"\nTraining on the pruned float32 feature set ({len(features)} total):")
+            print(features)
+
+        # 3. INITIALIZE AND TRAIN THE MODEL
+        # The gradient-boosting backend always trains on float32; the forest only when pruned
+        dtype = 'float32' if FEATURE_PRUNING or MODEL_BACKEND != 'forest' else 'float64'
+        print(f"Training the final model with the '{MODEL_BACKEND}' backend...")
+        if MODEL_BACKEND == 'forest':
+            model = fit_full_forest(X_train.astype(dtype), y_train, df['GAME_DATE_home'].iloc[:split_index])
+        else:
+            model = fit_model(MODEL_BACKEND, X_train, y_train, dtype=dtype)
+        attach_schema(model, features, dtype)
+        print("Model training complete.")
+
+        # 4. EVALUATE THE MODEL'S PERFORMANCE
+        predictions = predict(model, X_test)
+        mae = mean_absolute_error(y_test, predictions)
+        print("\n--- Final Model Evaluation ---")
+        print(f"Mean Absolute Error (MAE) on the test set: {mae:.2f}")
+        print(f"This means, on average, our model's prediction is off by about {mae:.2f} points.")
+        print("\nBenchmark to beat (our previous best V1 Model): 12.27")
+
+        # 5. SAVE THE TRAINED FINAL MODEL
+        print(f"\nSaving the final trained model to '{MODEL_OUTPUT_FILE}'...")
+        save_model(model, MODEL_OUTPUT_FILE)
+        print("Model saved successfully.")
+
+    if COMPARE_WITH_FULL_RETRAIN and MODEL_BACKEND == 'forest':
+        compare_incremental_to_full(X, y, df['GAME_DATE_home'], test_size=TEST_SIZE,
+                                    refresh_games=REFRESH_EVERY_GAMES, recent_window_games=RECENT_WINDOW_GAMES,
+                                    n_new_trees=NEW_TREES_PER_REFRESH, max_trees=MAX_TREES)
 
 except FileNotFoundError:
     print(f"ERROR: The file '{EWMA_FEATURE_FILE}' was not found.")
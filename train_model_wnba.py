@@ -1,12 +1,24 @@
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error
-import joblib
+import os
+from model_backends import fit_model, model_backend, save_model, load_model, predict
+from incremental_forest import fit_full_forest, add_recent_trees, compare_incremental_to_full
 
 # --- Configuration ---
 EWMA_FEATURE_FILE = "wnba_games_ewma_features.csv"
 MODEL_OUTPUT_FILE = "wnba_model_final.joblib" # Our final, champion model
 TEST_SIZE = 0.2
+MODEL_BACKEND = "forest" # 'forest' or 'hist_gb' (see model_backends.py)
+
+# --- Incremental Refresh Configuration ---
+# Nightly refresh: instead of refitting from scratch, add trees fitted on the most recent games
+# to the saved forest and evict the oldest ones, so refresh time scales with the window, not the history.
+INCREMENTAL_MODE = False
+RECENT_WINDOW_GAMES = 120 # Games each batch of new trees is fitted on
+NEW_TREES_PER_REFRESH = 10
+MAX_TREES = 200 # Oldest trees are evicted beyond this
+COMPARE_WITH_FULL_RETRAIN = False # Replay nightly refreshes and report the MAE cost versus a full retrain
+REFRESH_EVERY_GAMES = 30 # Refresh cadence used by the comparison report
 
 # --- Main Script ---
 print("--- Training Final Model on EWMA Features ---")
@@ -29,32 +41,69 @@ try:
     print(f"\nFeatures being used for the model ({len(features)} total):")
     print(features)
     
-    # 2. SPLIT DATA INTO TRAINING AND TESTING SETS
-    split_index = int(len(df) * (1 - TEST_SIZE))
-    
-    X_train, X_test = X.iloc[:split_index], X.iloc[split_index:]
-    y_train, y_test = y.iloc[:split_index], y.iloc[split_index:]
-
-    print(f"\nSplitting data: {len(X_train)} games for training, {len(X_test)} games for testing.")
-
-    # 3. INITIALIZE AND TRAIN THE MODEL
-    print("Training the final RandomForestRegressor model...")
-    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-    model.fit(X_train, y_train)
-    print("Model training complete.")
-
-    # 4. EVALUATE THE MODEL'S PERFORMANCE
-    predictions = model.predict(X_test)
-    mae = mean_absolute_error(y_test, predictions)
-    print("\n--- Final Model Evaluation ---")
-    print(f"Mean Absolute Error (MAE) on the test set: {mae:.2f}")
-    print(f"This means, on average, our model's prediction is off by about {mae:.2f} points.")
-    print("\nBenchmark to beat (our previous best V1 Model): 12.27")
-
-    # 5. SAVE THE TRAINED FINAL MODEL
-    print(f"\nSaving the final trained model to '{MODEL_OUTPUT_FILE}'...")
-    joblib.dump(model, MODEL_OUTPUT_FILE)
-    print("Model saved successfully.")
+    if INCREMENTAL_MODE and os.path.exists(MODEL_OUTPUT_FILE):
+        # 2. LOAD THE SAVED FOREST AND FIND THE GAMES IT HAS NOT SEEN
+        model = load_model(MODEL_OUTPUT_FILE)
+        if model_backend(model) != 'forest':
+            raise ValueError(f"Incremental refresh needs a 'forest' model, but '{MODEL_OUTPUT_FILE}' is '{model_backend(model)}'.")
+        trained_through = getattr(model, 'trained_through_', None)
+        new_games = df[df['GAME_DATE_home'] > pd.Timestamp(trained_through)] if trained_through else df
+        print(f"\nIncremental refresh: {len(new_games)} games played since the saved model was trained (through {trained_through}).")
+
+        if new_games.empty:
+            print("The saved model is already up to date. Nothing to refresh.")
+        else:
+            # 3. SCORE THE UNSEEN GAMES BEFORE THE MODEL LEARNS FROM THEM
+            mae = mean_absolute_error(new_games[target], predict(model, new_games[features]))
+            print(f"MAE of the saved model on the {len(new_games)} new games: {mae:.2f}")
+
+            # 4. ADD TREES FITTED ON THE RECENT WINDOW
+            # Widened to every unseen game after a long gap, so none is skipped when trained_through_ moves past it
+            recent = df.iloc[-max(RECENT_WINDOW_GAMES, len(new_games)):]
+            print(f"Adding {NEW_TREES_PER_REFRESH} trees fitted on the last {len(recent)} games...")
+            model = add_recent_trees(model, recent[features], recent[target], recent['GAME_DATE_home'],
+                                     NEW_TREES_PER_REFRESH, MAX_TREES)
+            windows = [w for w in model.tree_windows_ if w is not None]
+            print(f"Forest now has {len(model.estimators_)} trees covering data from "
+                  f"{min(w['start'] for w in windows) if windows else 'unknown'} to {model.trained_through_}.")
+
+            # 5. SAVE THE REFRESHED MODEL
+            save_model(model, MODEL_OUTPUT_FILE)
+            print(f"Refreshed model saved to '{MODEL_OUTPUT_FILE}'.")
+    else:
+        # 2. SPLIT DATA INTO TRAINING AND TESTING SETS
+        split_index = int(len(df) * (1 - TEST_SIZE))
+        
+        X_train, X_test = X.iloc[:split_index], X.iloc[split_index:]
+        y_train, y_test = y.iloc[:split_index], y.iloc[split_index:]
+
+        print(f"\nSplitting data: {len(X_train)} games for training, {len(X_test)} games for testing.")
+
+        # 3. INITIALIZE AND TRAIN THE MODEL
+        print(f"Training the final model with the '{MODEL_BACKEND}' backend...")
+        if MODEL_BACKEND == 'forest':
+            model = fit_full_forest(X_train, y_train, df['GAME_DATE_home'].iloc[:split_index])
+        else:
+            model = fit_model(MODEL_BACKEND, X_train, y_train)
+        print("Model training complete.")
+
+        # 4. EVALUATE THE MODEL'S PERFORMANCE
+        predictions = predict(model, X_test)
+        mae = mean_absolute_error(y_test, predictions)
+        print("\n--- Final Model Evaluation ---")
+        print(f"Mean Absolute Error (MAE) on the test set: {mae:.2f}")
+        print(f"This means, on average, our model's prediction is off by about {mae:.2f} points.")
+        print("\nBenchmark to beat (our previous best V1 Model): 12.27")
+
+        # 5. SAVE THE TRAINED FINAL MODEL
+        print(f"\nSaving the final trained model to '{MODEL_OUTPUT_FILE}'...")
+        save_model(model, MODEL_OUTPUT_FILE)
+        print("Model saved successfully.")
+
+    if COMPARE_WITH_FULL_RETRAIN and MODEL_BACKEND == 'forest':
+        compare_incremental_to_full(X, y, df['GAME_DATE_home'], test_size=TEST_SIZE,
+                                    refresh_games=REFRESH_EVERY_GAMES, recent_window_games=RECENT_WINDOW_GAMES,
+                                    n_new_trees=NEW_TREES_PER_REFRESH, max_trees=MAX_TREES)
 
 except FileNotFoundError:
     print(f"ERROR: The file '{EWMA_FEATURE_FILE}' was not found.")
@@ -1,11 +1,39 @@
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.base import clone
 from sklearn.model_selection import GridSearchCV
-import joblib
+from model_backends import make_model, attach_schema, save_model
+from feature_selection import select_features
 
 # --- Configuration ---
 WNBA_EWMA_FEATURE_FILE = "wnba_games_ewma_features.csv"
 TUNED_MODEL_OUTPUT_FILE = "wnba_model_tuned.joblib" # Our new, even better champion model
+MODEL_BACKEND = "forest" # 'forest' or 'hist_gb' (see model_backends.py)
+
+# The "grid" of parameters to test for each backend
+PARAM_GRIDS = {
+    'forest': {
+        'n_estimators': [100, 200, 300],
+        'max_depth': [10, 20, 30],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 'log2']
+    },
+    'hist_gb': {
+        'learning_rate': [0.03, 0.05, 0.1],
+        'max_leaf_nodes': [15, 31],
+        'min_samples_leaf': [20, 40],
+        'l2_regularization': [0.0, 1.0]
+    }
+}
+
+# --- Feature Pruning Configuration ---
+# Tune on one feature per cluster of highly correlated '_diff' columns, cast to float32,
+# as long as the validation MAE stays within budget. Every grid-search fit gets cheaper.
+FEATURE_PRUNING = False
+CORRELATION_THRESHOLD = 0.8 # Features more correlated than this are clustered together
+MAE_BUDGET = 0.05 # Max validation MAE increase (in points) the reduced feature set may cost
+# Features are picked on the earliest games only and the grid search is cross-validated on the rest,
+# so no CV fold is scored on games that chose the features
+SELECTION_FRACTION = 0.25
 
 # --- Main Script ---
 print("--- Hyperparameter Tuning for WNBA Model ---")
@@ -22,34 +50,48 @@ try:
     X = df[features]
     y = df[target]
 
-    print(f"\nTuning model on {len(X)} games...")
+    tune_start = 0
+    if FEATURE_PRUNING:
+        tune_start = int(len(X) * SELECTION_FRACTION)
+        features, _ = select_features(X.iloc[:tune_start], y.iloc[:tune_start], model_factory=lambda: make_model(MODEL_BACKEND),
+                                      correlation_threshold=CORRELATION_THRESHOLD, mae_budget=MAE_BUDGET)
+        X = X[features]
+        print(f"\nTuning on the pruned float32 feature set ({len(features)} total), picked on the earliest {tune_start} games:")
+        print(features)
 
-    # 1. DEFINE THE "GRID" OF PARAMETERS TO TEST
-    param_grid = {
-        'n_estimators': [100, 200, 300],
-        'max_depth': [10, 20, 30],
-        'min_samples_leaf': [1, 2, 4],
-        'max_features': ['sqrt', 'log2']
-    }
+    # The gradient-boosting backend always trains on float32; the forest only when pruned
+    dtype = 'float32' if FEATURE_PRUNING or MODEL_BACKEND != 'forest' else 'float64'
+    X = X.astype(dtype)
+
+    print(f"\nTuning '{MODEL_BACKEND}' model on {len(X) - tune_start} games...")
+
+    # 1. PICK THE "GRID" OF PARAMETERS TO TEST
+    param_grid = PARAM_GRIDS[MODEL_BACKEND]
 
     # 2. SET UP AND RUN THE GRID SEARCH
     print("Starting GridSearchCV... This may take several minutes.")
-    model = RandomForestRegressor(random_state=42, n_jobs=-1)
+    model = make_model(MODEL_BACKEND)
     grid_search = GridSearchCV(estimator=model, param_grid=param_grid, 
                                scoring='neg_mean_absolute_error', cv=5, verbose=2)
     
-    grid_search.fit(X, y)
+    grid_search.fit(X.iloc[tune_start:], y.iloc[tune_start:])
 
     # 3. REPORT THE BEST SETTINGS
     print("\n--- Tuning Complete ---")
     print(f"Best parameters found: {grid_search.best_params_}")
     best_mae = -grid_search.best_score_
-    print(f"Best Cross-Validated MAE from tuning: {best_mae:.2f}")
+    print(f"Best Cross-Validated MAE from tuning: {best_mae:.2f}"
+          + (f" (on the {len(X) - tune_start} games after the feature-selection slice)" if tune_start else ""))
 
     # 4. SAVE THE BEST MODEL FOUND BY THE GRID SEARCH
-    best_model = grid_search.best_estimator_
+    # The winning settings are refitted on every game, the feature-selection games included
+    best_estimator = clone(grid_search.best_estimator_).fit(X, y) if tune_start else grid_search.best_estimator_
+    best_model = attach_schema(best_estimator, features, dtype)
+    best_model.backend_ = MODEL_BACKEND
+    # Fitted on every game, so only later games are unseen by this model
+    best_model.trained_through_ = str(df['GAME_DATE_home'].max().date())
     print(f"\nSaving the best tuned WNBA model to '{TUNED_MODEL_OUTPUT_FILE}'...")
-    joblib.dump(best_model, TUNED_MODEL_OUTPUT_FILE)
+    save_model(best_model, TUNED_MODEL_OUTPUT_FILE)
     print("Tuned model saved successfully.")
 
 except FileNotFoundError: